@@ -5,3 +5,7 @@ class AuthenticationConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.authentication"
     verbose_name = "Authentication"
+
+    def ready(self):
+        from apps.authentication.services.key_ring import KeyRing
+        KeyRing.get()
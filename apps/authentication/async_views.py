@@ -0,0 +1,140 @@
+"""Async views аутентификации для ASGI развертывания."""
+import json
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from apps.authentication.serializers import LoginSerializer, RefreshTokenSerializer, UserSerializer
+from apps.authentication.services.auth_service import AuthService
+from apps.authentication.services.throttle_service import ThrottleService
+from core.response import json_success_response, json_error_response
+from core.exceptions import AuthenticationFailed, UserInactive, PasswordHasherBusy, TooManyRequests
+
+
+class AsyncAPIView(View):
+    """Базовый async view: JWT аутентификация и разбор JSON без DRF."""
+    keyword = 'Bearer'
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = AnonymousUser()
+        request.auth = None
+
+        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+        parts = auth_header.split()
+
+        if parts and parts[0].lower() == self.keyword.lower():
+            if len(parts) != 2:
+                return JsonResponse({'detail': 'Invalid token header.'}, status=status.HTTP_401_UNAUTHORIZED)
+
+            result = await AuthService.aauthenticate_token(parts[1])
+            if not result:
+                return JsonResponse({'detail': 'Invalid or expired token.'}, status=status.HTTP_401_UNAUTHORIZED)
+
+            request.user, request.auth = result
+
+        try:
+            request.data = json.loads(request.body) if request.body else {}
+        except ValueError as e:
+            return JsonResponse({'detail': f'JSON parse error - {e}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncLoginView(AsyncAPIView):
+    """Вход пользователя (async)."""
+
+    async def post(self, request):
+        try:
+            await ThrottleService.acheck_login(request)
+        except TooManyRequests as e:
+            response = json_error_response(
+                message=str(e),
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+            response['Retry-After'] = str(e.wait)
+            return response
+
+        serializer = LoginSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return json_error_response(
+                message="Validation failed",
+                errors=serializer.errors,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            result = await AuthService.alogin(
+                email=serializer.validated_data['email'],
+                password=serializer.validated_data['password']
+            )
+        except (AuthenticationFailed, UserInactive) as e:
+            return json_error_response(
+                message=str(e),
+                status_code=status.HTTP_401_UNAUTHORIZED
+            )
+        except PasswordHasherBusy as e:
+            return json_error_response(
+                message=str(e),
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        except Exception as e:
+            return json_error_response(
+                message="Login failed",
+                errors={'detail': str(e)},
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        response_data = {
+            'user': UserSerializer(result['user']).data,
+            'access_token': result['access_token'],
+            'refresh_token': result['refresh_token']
+        }
+
+        return json_success_response(
+            data=response_data,
+            message="Login successful",
+            status_code=status.HTTP_200_OK
+        )
+
+
+class AsyncRefreshTokenView(AsyncAPIView):
+    """Обновление access токена (async)."""
+
+    async def post(self, request):
+        serializer = RefreshTokenSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return json_error_response(
+                message="Validation failed",
+                errors=serializer.errors,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            result = await AuthService.arefresh_access_token(
+                refresh_token=serializer.validated_data['refresh_token']
+            )
+        except AuthenticationFailed as e:
+            return json_error_response(
+                message=str(e),
+                status_code=status.HTTP_401_UNAUTHORIZED
+            )
+        except Exception as e:
+            return json_error_response(
+                message="Token refresh failed",
+                errors={'detail': str(e)},
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        return json_success_response(
+            data=result,
+            message="Token refreshed successfully",
+            status_code=status.HTTP_200_OK
+        )
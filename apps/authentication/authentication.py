@@ -31,12 +31,13 @@ class JWTAuthentication(BaseAuthentication):
 
             token = parts[1]
 
-            user = AuthService.get_user_from_token(token)
+            result = AuthService.authenticate_token(token)
 
-            if not user:
+            if not result:
                 raise AuthenticationFailed('Invalid or expired token.')
 
-            return (user, token)
+            user, payload = result
+            return (user, payload)
 
         except AuthenticationFailed:
             raise
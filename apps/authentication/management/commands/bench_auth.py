@@ -0,0 +1,225 @@
+"""Микробенчмарки аутентификации и RBAC."""
+import json
+import math
+import platform
+import time
+import django
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from apps.users.models import User
+from apps.permissions.models import Role, BusinessElement, AccessRule, UserRole
+from apps.permissions.services.effective_permission_service import EffectivePermissionService
+from apps.permissions.services.permission_service import PermissionService
+from apps.permissions.services.rbac_index import RBACIndex
+from apps.authentication.services.auth_service import AuthService
+from apps.authentication.services.password_service import PasswordService
+from apps.authentication.services.token_cache import TokenCache
+from apps.authentication.services.token_service import TokenService
+
+
+BENCH_PASSWORD = 'BenchPassword123!'
+
+
+def _percentile(sorted_timings, fraction):
+    index = max(0, math.ceil(fraction * len(sorted_timings)) - 1)
+    return sorted_timings[index]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark auth and RBAC hot paths, print results as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=1000, help='Iterations per benchmark')
+        parser.add_argument('--bcrypt-iterations', type=int, default=5, help='Iterations for bcrypt benchmarks')
+        parser.add_argument('--role-counts', default='1,5,20', help='Comma separated role counts for check_permission')
+        parser.add_argument('--temp-db', action='store_true', help='Run against a temporary test database')
+        parser.add_argument('--output', help='Write JSON to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        self.iterations = options['iterations']
+        role_counts = [int(count) for count in options['role_counts'].split(',') if count]
+
+        setup_test_environment()
+        old_name = None
+        if options['temp_db']:
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+        try:
+            results = self._run(role_counts, options['bcrypt_iterations'])
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            RBACIndex.bump_version()
+            TokenCache.clear()
+
+        report = {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'iterations': self.iterations,
+            },
+            'results': results,
+        }
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+            self.stderr.write(self.style.SUCCESS(f"✓ Results written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def _run(self, role_counts, bcrypt_iterations):
+        results = []
+
+        # Фикстуры откатываются вместе с транзакцией
+        with transaction.atomic():
+            user, element = self._create_fixtures(max(role_counts))
+            RBACIndex.bump_version()
+            tokens = TokenService.create_tokens(user.id)
+            access_token = tokens['access_token']
+
+            results.append(self._bench('TokenService.create_tokens', lambda: TokenService.create_tokens(user.id)))
+            results.append(self._bench('TokenService.decode_token', lambda: TokenService.decode_token(access_token)))
+
+            results.append(self._bench(
+                'AuthService.get_user_from_token[cold]',
+                lambda: AuthService.get_user_from_token(access_token),
+                setup=TokenCache.clear
+            ))
+            results.append(self._bench(
+                'AuthService.get_user_from_token[warm]',
+                lambda: AuthService.get_user_from_token(access_token)
+            ))
+
+            for role_count in role_counts:
+                self._assign_roles(user, role_count)
+                RBACIndex.bump_version()
+                check = lambda: PermissionService.check_permission(user, element.code, 'read')  # noqa: E731
+
+                results.append(self._bench(
+                    f'PermissionService.check_permission[roles={role_count},cold]',
+                    check,
+                    setup=lambda: RBACIndex.snapshot().user_roles.clear()
+                ))
+                results.append(self._bench(f'PermissionService.check_permission[roles={role_count},warm]', check))
+
+                with override_settings(RBAC_MATERIALIZED_PERMISSIONS=True):
+                    results.append(self._bench(
+                        f'PermissionService.check_permission[roles={role_count},materialized,cold]',
+                        check,
+                        setup=lambda: RBACIndex.snapshot().user_masks.clear()
+                    ))
+
+            hashed = PasswordService.hash_password(BENCH_PASSWORD)
+            results.append(self._bench(
+                'PasswordService.verify_password',
+                lambda: PasswordService.verify_password(BENCH_PASSWORD, hashed),
+                iterations=bcrypt_iterations
+            ))
+
+            client = Client()
+            headers = {'HTTP_AUTHORIZATION': f'Bearer {access_token}'}
+            results.append(self._bench('GET /api/products/', lambda: client.get('/api/products/', **headers)))
+
+            transaction.set_rollback(True)
+
+        results.extend(self._bench_connections())
+        return results
+
+    def _bench_connections(self):
+        """Получение соединения в начале запроса: новое на каждый запрос против постоянного."""
+        health_checks = connection.settings_dict['CONN_HEALTH_CHECKS']
+
+        def new_connection():
+            wrapper = self._connection(CONN_MAX_AGE=0)
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            wrapper.close()
+
+        persistent = self._connection(CONN_MAX_AGE=None)
+
+        def persistent_connection():
+            # То же, что делает Django на границе запросов, плюс проверка при первом запросе
+            persistent.close_if_unusable_or_obsolete()
+            with persistent.cursor() as cursor:
+                cursor.execute('SELECT 1')
+
+        try:
+            return [
+                self._bench('db.checkout[new connection]', new_connection),
+                self._bench(f'db.checkout[persistent,health_checks={health_checks}]', persistent_connection),
+            ]
+        finally:
+            persistent.close()
+
+    @staticmethod
+    def _connection(**overrides):
+        """Отдельное соединение с настройками default, не задевающее текущую транзакцию."""
+        wrapper = connections[DEFAULT_DB_ALIAS]
+        return type(wrapper)({**wrapper.settings_dict, **overrides}, wrapper.alias)
+
+    def _create_fixtures(self, role_count):
+        suffix = int(time.time() * 1000)
+        user = User.objects.create(
+            email=f'bench_{suffix}@example.com',
+            first_name='Bench',
+            last_name='User',
+            password=PasswordService.hash_password(BENCH_PASSWORD)
+        )
+
+        element, _ = BusinessElement.objects.get_or_create(
+            code='products',
+            defaults={'name': 'Products', 'description': 'Product catalog'}
+        )
+
+        roles = Role.objects.bulk_create([
+            Role(name=f'bench_{suffix}_{index}', description='Benchmark role') for index in range(role_count)
+        ])
+        # Правило с доступом только у последней роли: проверка проходит по всем ролям
+        AccessRule.objects.bulk_create([
+            AccessRule(role=role, element=element, can_read=index == role_count - 1, can_read_all=index == role_count - 1)
+            for index, role in enumerate(roles)
+        ])
+
+        self._bench_roles = roles
+        return user, element
+
+    def _assign_roles(self, user, role_count):
+        UserRole.objects.filter(user=user).delete()
+        UserRole.objects.bulk_create([
+            UserRole(user=user, role=role) for role in self._bench_roles[-role_count:]
+        ])
+        EffectivePermissionService.refresh_users([user.id])
+
+    def _bench(self, name, fn, setup=None, iterations=None):
+        iterations = iterations or self.iterations
+        timings = []
+
+        for _ in range(iterations):
+            if setup is not None:
+                setup()
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+
+        timings.sort()
+        total = sum(timings)
+        self.stderr.write(f"  {name}: {iterations / total:,.0f} ops/s")
+
+        return {
+            'name': name,
+            'iterations': iterations,
+            'ops_per_sec': round(iterations / total, 2) if total else None,
+            'mean_ms': round(total / iterations * 1000, 4),
+            'p50_ms': round(_percentile(timings, 0.50) * 1000, 4),
+            'p95_ms': round(_percentile(timings, 0.95) * 1000, 4),
+            'p99_ms': round(_percentile(timings, 0.99) * 1000, 4),
+        }
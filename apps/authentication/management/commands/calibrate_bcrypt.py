@@ -0,0 +1,30 @@
+"""Команда подбора bcrypt work factor под целевую задержку."""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.authentication.services.password_service import PasswordService
+
+
+class Command(BaseCommand):
+    help = 'Calibrate BCRYPT_ROUNDS for a target password verify latency on this machine'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target-ms', type=float, default=250, help='Target verify latency in milliseconds')
+        parser.add_argument('--samples', type=int, default=3, help='Measurements per work factor')
+
+    def handle(self, *args, **options):
+        target_ms = options['target_ms']
+        self.stdout.write(f"Calibrating bcrypt for {target_ms:.0f} ms...")
+
+        timings = PasswordService.calibrate_rounds(target_ms, samples=options['samples'])
+        for rounds, elapsed in timings.items():
+            self.stdout.write(f"  rounds={rounds:<3} {elapsed:8.1f} ms")
+
+        within_target = [rounds for rounds, elapsed in timings.items() if elapsed <= target_ms]
+        recommended = max(within_target) if within_target else min(timings)
+
+        self.stdout.write(self.style.SUCCESS(f"✓ Recommended: BCRYPT_ROUNDS={recommended}"))
+        if recommended != settings.BCRYPT_ROUNDS:
+            self.stdout.write(
+                f"Current BCRYPT_ROUNDS={settings.BCRYPT_ROUNDS}; "
+                f"passwords are rehashed on next successful login after the change."
+            )
@@ -0,0 +1,11 @@
+"""Команда очистки истекших записей об отозванных токенах."""
+from django.core.management.base import BaseCommand
+from apps.authentication.services.revocation_service import RevocationService
+
+
+class Command(BaseCommand):
+    help = 'Delete revoked token records whose tokens have already expired'
+
+    def handle(self, *args, **options):
+        deleted = RevocationService.prune()
+        self.stdout.write(self.style.SUCCESS(f"✓ {deleted} expired revoked tokens deleted"))
@@ -0,0 +1,14 @@
+"""Команда удаления истекших семейств refresh токенов."""
+from django.core.management.base import BaseCommand
+from apps.authentication.services.refresh_token_service import RefreshTokenService
+
+
+class Command(BaseCommand):
+    help = 'Delete refresh token families whose tokens have all expired'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Families deleted per statement')
+
+    def handle(self, *args, **options):
+        deleted = RefreshTokenService.purge_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"✓ {deleted} expired refresh tokens deleted"))
@@ -1 +1,35 @@
+"""Модели аутентификации."""
+from django.conf import settings
 from django.db import models
+
+
+class RevokedToken(models.Model):
+    """Отозванный до истечения срока JWT (по jti)."""
+    jti = models.CharField(max_length=64, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = 'revoked_tokens'
+
+    def __str__(self):
+        return f"{self.jti} (expires {self.expires_at})"
+
+
+class RefreshToken(models.Model):
+    """Выданный refresh токен; токены одной цепочки ротации образуют семейство."""
+    jti = models.CharField(max_length=32, primary_key=True)
+    family_id = models.CharField(max_length=32, db_index=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    expires_at = models.DateTimeField()
+    rotated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'refresh_tokens'
+        indexes = [
+            # Поиск истекших семейств в purge_expired
+            models.Index(fields=['expires_at', 'family_id'], name='refresh_expires_family_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.jti} (family {self.family_id})"
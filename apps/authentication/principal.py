@@ -0,0 +1,69 @@
+"""Легковесный аутентифицированный пользователь запроса."""
+import asyncio
+from typing import Optional, Tuple
+from apps.users.models import User
+
+
+class Principal:
+    """Минимальные данные пользователя из токена или кеша; модель User грузится лениво."""
+    __slots__ = ('id', 'email', 'is_active', 'is_staff', 'role_ids', 'policy_version', '_user')
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(
+        self,
+        id: int,
+        email: str,
+        is_active: bool,
+        is_staff: bool,
+        role_ids: Optional[Tuple[int, ...]],
+        policy_version: Optional[str] = None
+    ):
+        self.id = id
+        self.email = email
+        self.is_active = is_active
+        self.is_staff = is_staff
+        # None - роли не загружены: проверки читают user_effective_permissions
+        self.role_ids = role_ids
+        self.policy_version = policy_version
+        self._user = None
+
+    @property
+    def pk(self) -> int:
+        return self.id
+
+    def copy(self) -> 'Principal':
+        """Копия без загруженной модели - для изоляции запросов при кешировании."""
+        return Principal(self.id, self.email, self.is_active, self.is_staff, self.role_ids, self.policy_version)
+
+    def get_user(self) -> User:
+        """Загружает полную модель User при первом обращении."""
+        if self._user is None:
+            self._user = User.objects.get(id=self.id)
+        return self._user
+
+    async def aget_user(self) -> User:
+        """Async вариант get_user()."""
+        if self._user is None:
+            self._user = await User.objects.aget(id=self.id)
+        return self._user
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        if self._user is None and _in_event_loop():
+            # Синхронный ORM в event loop запрещен: async код загружает модель через aget_user()
+            raise AttributeError(f"'{name}' requires the User model: call 'await aget_user()' first")
+        return getattr(self.get_user(), name)
+
+    def __repr__(self):
+        return f"<Principal id={self.id} email={self.email}>"
+
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
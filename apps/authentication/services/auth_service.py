@@ -1,13 +1,27 @@
 """Сервис аутентификации пользователей."""
-from typing import Dict, Optional
-from django.db import transaction
+import time
+from typing import Dict, Optional, Tuple
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.utils import timezone
 from apps.users.models import User
+from apps.authentication.principal import Principal
 from apps.authentication.services.password_service import PasswordService
 from apps.authentication.services.token_service import TokenService
+from apps.authentication.services.token_cache import TokenCache
+from apps.authentication.services.revocation_service import RevocationService
+from apps.authentication.services.refresh_token_service import RefreshTokenService
+from apps.permissions.services.permission_service import PermissionService
+from apps.permissions.services.rbac_index import RBACIndex
+from core import db_router, metrics
+from core.timing import timed
 from core.exceptions import (
     AuthenticationFailed,
     ValidationError,
-    UserInactive
+    UserInactive,
+    PasswordHasherBusy
 )
 
 
@@ -15,7 +29,6 @@ class AuthService:
     """Обработка операций аутентификации."""
 
     @staticmethod
-    @transaction.atomic
     def register(
         email: str,
         password: str,
@@ -24,30 +37,34 @@ class AuthService:
         middle_name: Optional[str] = None,
         created_by: Optional[User] = None
     ) -> User:
-        """Регистрация нового пользователя."""
-        if User.objects.filter(email=email).exists():
-            raise ValidationError(f"User with email {email} already exists")
-
+        """Регистрация нового пользователя: хеш до транзакции, одна вставка."""
         if not password or len(password) < 8:
             raise ValidationError("Password must be at least 8 characters long")
 
-        hashed_password = PasswordService.hash_password(password)
-
-        user = User.objects.create_user(
+        email = User.objects.normalize_email(email)
+        user = User(
             email=email,
-            password=None,
+            password=PasswordService.hash_password_pooled(password),
             first_name=first_name,
             last_name=last_name,
             middle_name=middle_name,
             created_by=created_by
         )
 
-        user.password = hashed_password
-        user.save()
+        # Уникальность email проверяет БД: без гонки между exists() и вставкой
+        try:
+            with transaction.atomic():
+                user.save(force_insert=True)
+        except IntegrityError:
+            # Остальные нарушения (created_by, NOT NULL) - не конфликт email, их не маскируем
+            if User.objects.using(DEFAULT_DB_ALIAS).filter(email=email).exists():
+                raise ValidationError(f"User with email {email} already exists")
+            raise
 
         return user
 
     @staticmethod
+    @metrics.count_outcome('auth_login_total')
     def login(email: str, password: str) -> Dict[str, any]:
         """Аутентификация и генерация токенов."""
         try:
@@ -58,60 +75,346 @@ class AuthService:
         if not user.is_active:
             raise UserInactive("User account is inactive")
 
-        if not PasswordService.verify_password(password, user.password):
+        if not PasswordService.verify_password_pooled(password, user.password):
             raise AuthenticationFailed("Invalid email or password")
 
-        tokens = TokenService.create_tokens(user.id)
+        if PasswordService.needs_rehash(user.password):
+            # Перехеширование попутное: занятый пул не должен превращать верный логин в 503
+            try:
+                user.password = PasswordService.hash_password_pooled(password)
+                User.objects.filter(pk=user.pk).update(password=user.password)
+            except PasswordHasherBusy:
+                pass
 
         return {
             'user': user,
-            'access_token': tokens['access_token'],
-            'refresh_token': tokens['refresh_token']
+            'access_token': TokenService.create_access_token(user.id, AuthService.get_token_claims(user)),
+            'refresh_token': RefreshTokenService.issue(user.id)
+        }
+
+    @staticmethod
+    @metrics.count_outcome('auth_login_total')
+    async def alogin(email: str, password: str) -> Dict[str, any]:
+        """Async вариант login(): async ORM и bcrypt в пуле."""
+        try:
+            user = await User.objects.aget(email=email)
+        except User.DoesNotExist:
+            raise AuthenticationFailed("Invalid email or password")
+
+        if not user.is_active:
+            raise UserInactive("User account is inactive")
+
+        if not await PasswordService.averify_password(password, user.password):
+            raise AuthenticationFailed("Invalid email or password")
+
+        if PasswordService.needs_rehash(user.password):
+            try:
+                user.password = await PasswordService.ahash_password(password)
+                await User.objects.filter(pk=user.pk).aupdate(password=user.password)
+            except PasswordHasherBusy:
+                pass
+
+        return {
+            'user': user,
+            'access_token': TokenService.create_access_token(user.id, await AuthService.aget_token_claims(user)),
+            'refresh_token': await RefreshTokenService.aissue(user.id)
         }
 
     @staticmethod
     def refresh_access_token(refresh_token: str) -> Dict[str, str]:
         """Обновление access токена через refresh токен."""
-        import jwt
+        payload = AuthService._decode_refresh_token(refresh_token)
+        if RevocationService.is_revoked(payload.get('jti')):
+            raise AuthenticationFailed("Refresh token has been revoked")
 
         try:
-            payload = TokenService.decode_token(refresh_token)
+            user = User.objects.get(id=payload['user_id'], is_active=True)
+        except User.DoesNotExist:
+            raise AuthenticationFailed("User not found or inactive")
 
-            if payload.get('type') != 'refresh':
-                raise AuthenticationFailed("Invalid token type")
+        access_token = TokenService.create_access_token(user.id, AuthService.get_token_claims(user))
 
-            user_id = payload.get('user_id')
-            if not user_id:
-                raise AuthenticationFailed("Invalid token payload")
+        return {
+            'access_token': access_token,
+            'refresh_token': AuthService._rotate_refresh_token(payload)
+        }
 
-            try:
-                user = User.objects.get(id=user_id, is_active=True)
-            except User.DoesNotExist:
-                raise AuthenticationFailed("User not found or inactive")
+    @staticmethod
+    async def arefresh_access_token(refresh_token: str) -> Dict[str, str]:
+        """Async вариант refresh_access_token()."""
+        payload = AuthService._decode_refresh_token(refresh_token)
+        if await RevocationService.ais_revoked(payload.get('jti')):
+            raise AuthenticationFailed("Refresh token has been revoked")
 
-            access_token = TokenService.create_access_token(user.id)
+        try:
+            user = await User.objects.aget(id=payload['user_id'], is_active=True)
+        except User.DoesNotExist:
+            raise AuthenticationFailed("User not found or inactive")
 
-            return {
-                'access_token': access_token
-            }
+        access_token = TokenService.create_access_token(user.id, await AuthService.aget_token_claims(user))
 
-        except (jwt.ExpiredSignatureError, jwt.InvalidTokenError) as e:
-            raise AuthenticationFailed(f"Invalid refresh token: {str(e)}")
+        return {
+            'access_token': access_token,
+            'refresh_token': await sync_to_async(AuthService._rotate_refresh_token)(payload)
+        }
 
     @staticmethod
-    def get_user_from_token(token: str) -> Optional[User]:
-        """Извлечение пользователя из JWT токена."""
+    def _rotate_refresh_token(payload: Dict) -> str:
+        refresh_token = RefreshTokenService.rotate(payload)
+        if not payload.get('fam'):
+            # Токен без семейства нельзя отследить при повторе - отзываем явно
+            RevocationService.revoke_payload(payload)
+        return refresh_token
+
+    @staticmethod
+    def _decode_refresh_token(refresh_token: str) -> Dict:
         import jwt
 
         try:
-            payload = TokenService.decode_token(token)
-            user_id = payload.get('user_id')
+            payload = TokenService.decode_token(refresh_token)
+        except (jwt.ExpiredSignatureError, jwt.InvalidTokenError) as e:
+            raise AuthenticationFailed(f"Invalid refresh token: {str(e)}")
+
+        if payload.get('type') != 'refresh':
+            raise AuthenticationFailed("Invalid token type")
+
+        if not payload.get('user_id'):
+            raise AuthenticationFailed("Invalid token payload")
+
+        return payload
+
+    @staticmethod
+    def get_token_claims(user: User) -> Optional[Dict]:
+        """Дополнительные claims access токена (RBAC профиль, если включен)."""
+        if not settings.JWT_EMBED_RBAC_CLAIMS:
+            return None
+
+        claims = {'email': user.email, 'staff': user.is_staff}
+        claims.update(PermissionService.get_token_claims(user))
+        return claims
+
+    @staticmethod
+    async def aget_token_claims(user: User) -> Optional[Dict]:
+        """Async вариант get_token_claims()."""
+        if not settings.JWT_EMBED_RBAC_CLAIMS:
+            return None
+
+        claims = {'email': user.email, 'staff': user.is_staff}
+        claims.update(await PermissionService.aget_token_claims(user))
+        return claims
+
+    @staticmethod
+    def authenticate_token(token: str) -> Optional[Tuple[Principal, Dict]]:
+        """Principal и payload JWT токена."""
+        principal, payload = AuthService._lookup_token(token)
+        if payload is None:
+            metrics.inc('auth_token_verifications_total', result='invalid')
+            return None
+
+        db_router.stick_to_user(payload.get('user_id'))
+
+        if RevocationService.is_revoked(payload.get('jti')):
+            metrics.inc('auth_token_verifications_total', result='revoked')
+            return None
+
+        if principal is None:
+            principal = AuthService.resolve_principal(payload)
+            if principal is None:
+                metrics.inc('auth_token_verifications_total', result='inactive')
+                return None
+            TokenCache.set(token, principal, payload)
+
+        metrics.inc('auth_token_verifications_total', result='valid')
+        return principal.copy(), payload
+
+    @staticmethod
+    async def aauthenticate_token(token: str) -> Optional[Tuple[Principal, Dict]]:
+        """Async вариант authenticate_token()."""
+        principal, payload = await AuthService._alookup_token(token)
+        if payload is None:
+            metrics.inc('auth_token_verifications_total', result='invalid')
+            return None
 
-            if not user_id:
+        await db_router.astick_to_user(payload.get('user_id'))
+
+        if await RevocationService.ais_revoked(payload.get('jti')):
+            metrics.inc('auth_token_verifications_total', result='revoked')
+            return None
+
+        if principal is None:
+            principal = await AuthService.aresolve_principal(payload)
+            if principal is None:
+                metrics.inc('auth_token_verifications_total', result='inactive')
                 return None
+            TokenCache.set(token, principal, payload)
+
+        metrics.inc('auth_token_verifications_total', result='valid')
+        return principal.copy(), payload
+
+    @staticmethod
+    def _lookup_token(token: str) -> Tuple[Optional[Principal], Optional[Dict]]:
+        """Актуальный Principal из кеша и payload проверенного токена."""
+        import jwt
+
+        cached = TokenCache.get(token)
+        if cached is not None:
+            principal, payload = cached
+            if principal.policy_version != RBACIndex.current_version():
+                principal = None
+        else:
+            try:
+                principal, payload = None, TokenService.decode_token(token)
+            except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
+                return None, None
+
+        if AuthService._issued_before_invalidation(payload):
+            return None, None
+        return principal, payload
+
+    @staticmethod
+    async def _alookup_token(token: str) -> Tuple[Optional[Principal], Optional[Dict]]:
+        """Async вариант _lookup_token()."""
+        import jwt
+
+        cached = TokenCache.get(token)
+        if cached is not None:
+            principal, payload = cached
+            if principal.policy_version != await RBACIndex.acurrent_version():
+                principal = None
+        else:
+            try:
+                principal, payload = None, TokenService.decode_token(token)
+            except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
+                return None, None
+
+        if await AuthService._aissued_before_invalidation(payload):
+            return None, None
+        return principal, payload
+
+    @staticmethod
+    def _invalidated_key(user_id) -> str:
+        return f'auth:user_invalidated:{user_id}'
+
+    @staticmethod
+    def _issued_before_invalidation(payload: Dict) -> bool:
+        """Выпущен ли токен до деактивации пользователя (метка в кеше живет не дольше access токена)."""
+        invalidated_at = cache.get(AuthService._invalidated_key(payload.get('user_id')))
+        return invalidated_at is not None and payload.get('iat', 0) < invalidated_at
+
+    @staticmethod
+    async def _aissued_before_invalidation(payload: Dict) -> bool:
+        """Async вариант _issued_before_invalidation()."""
+        invalidated_at = await cache.aget(AuthService._invalidated_key(payload.get('user_id')))
+        return invalidated_at is not None and payload.get('iat', 0) < invalidated_at
+
+    @staticmethod
+    @timed('user_lookup')
+    def resolve_principal(payload: Dict) -> Optional[Principal]:
+        """Строит Principal из claims токена, либо из БД, если claims устарели."""
+        user_id = payload.get('user_id')
+        if not user_id:
+            return None
 
-            user = User.objects.get(id=user_id, is_active=True)
-            return user
+        snapshot = RBACIndex.snapshot()
+        principal = AuthService._principal_from_claims(payload, snapshot.version)
+        if principal is not None:
+            return principal
 
-        except (jwt.ExpiredSignatureError, jwt.InvalidTokenError, User.DoesNotExist):
-            return None
\ No newline at end of file
+        row = User.objects.filter(id=user_id, is_active=True).values_list('email', 'is_staff').first()
+        if row is None:
+            return None
+
+        # С материализованными правами проверки читают маску из user_effective_permissions: роли не нужны
+        role_ids = None
+        if not settings.RBAC_MATERIALIZED_PERMISSIONS:
+            role_ids = RBACIndex.get_role_ids(user_id, snapshot)
+
+        email, is_staff = row
+        return Principal(
+            id=user_id,
+            email=email,
+            is_active=True,
+            is_staff=is_staff,
+            role_ids=role_ids,
+            policy_version=snapshot.version
+        )
+
+    @staticmethod
+    @timed('user_lookup')
+    async def aresolve_principal(payload: Dict) -> Optional[Principal]:
+        """Async вариант resolve_principal()."""
+        user_id = payload.get('user_id')
+        if not user_id:
+            return None
+
+        snapshot = await RBACIndex.asnapshot()
+        principal = AuthService._principal_from_claims(payload, snapshot.version)
+        if principal is not None:
+            return principal
+
+        row = await User.objects.filter(id=user_id, is_active=True).values_list('email', 'is_staff').afirst()
+        if row is None:
+            return None
+
+        role_ids = None
+        if not settings.RBAC_MATERIALIZED_PERMISSIONS:
+            role_ids = await RBACIndex.aget_role_ids(user_id, snapshot)
+
+        email, is_staff = row
+        return Principal(
+            id=user_id,
+            email=email,
+            is_active=True,
+            is_staff=is_staff,
+            role_ids=role_ids,
+            policy_version=snapshot.version
+        )
+
+    @staticmethod
+    def _principal_from_claims(payload: Dict, version: str) -> Optional[Principal]:
+        role_ids = PermissionService.get_claimed_role_ids(payload.get('user_id'), payload, version)
+        if role_ids is None or 'email' not in payload:
+            return None
+
+        return Principal(
+            id=payload['user_id'],
+            email=payload['email'],
+            is_active=True,
+            is_staff=bool(payload.get('staff')),
+            role_ids=role_ids,
+            policy_version=version
+        )
+
+    @staticmethod
+    def logout(access_payload: Optional[Dict], refresh_token: Optional[str] = None) -> None:
+        """Отзывает access токен запроса и, если передан, refresh токен того же пользователя."""
+        if access_payload:
+            RevocationService.revoke_payload(access_payload)
+
+        if refresh_token:
+            payload = AuthService._decode_refresh_token(refresh_token)
+            if access_payload and payload['user_id'] != access_payload.get('user_id'):
+                raise AuthenticationFailed("Refresh token belongs to another user")
+            RevocationService.revoke_payload(payload)
+            if payload.get('fam'):
+                RefreshTokenService.revoke_family(payload['fam'])
+
+    @staticmethod
+    def deactivate_user(user_id: int) -> None:
+        """Деактивирует пользователя и сбрасывает его кешированные токены."""
+        User.objects.filter(id=user_id).update(is_active=False, updated_at=timezone.now())
+        TokenCache.invalidate_user(user_id)
+        db_router.pin_users([user_id])
+
+        # Только этот пользователь: его токены, выпущенные до коммита, отклоняются во всех процессах,
+        # версия политики и чужие Principal не затрагиваются
+        timeout = int(settings.JWT_ACCESS_TOKEN_LIFETIME.total_seconds())
+        transaction.on_commit(
+            lambda: cache.set(AuthService._invalidated_key(user_id), time.time(), timeout)
+        )
+
+    @staticmethod
+    def get_user_from_token(token: str) -> Optional[Principal]:
+        """Извлечение пользователя из JWT токена."""
+        result = AuthService.authenticate_token(token)
+        return result[0] if result else None
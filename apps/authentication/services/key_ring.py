@@ -0,0 +1,122 @@
+"""Набор ключей подписи JWT с выбором по kid."""
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from jwt.algorithms import get_default_algorithms
+
+
+DEFAULT_KID = 'default'
+
+ACTIVE = 'active'
+RETIRING = 'retiring'
+
+
+class SigningKey:
+    """Разобранный ключ: объекты ключей готовы для jwt.encode/jwt.decode."""
+    __slots__ = ('kid', 'algorithm', 'signing_key', 'verifying_key')
+
+    def __init__(self, kid: str, algorithm: str, signing_key: Any, verifying_key: Any):
+        self.kid = kid
+        self.algorithm = algorithm
+        self.signing_key = signing_key
+        self.verifying_key = verifying_key
+
+
+class KeyRing:
+    """Активный ключ подписывает, активный и выводимые из оборота - проверяют."""
+
+    _instance: Optional['KeyRing'] = None
+    _lock = threading.Lock()
+
+    def __init__(self, keys: Dict[str, SigningKey], active_kid: str):
+        self.keys = keys
+        self.active = keys[active_kid]
+
+    def find(self, kid: Optional[str]) -> Optional[SigningKey]:
+        """Ключ по kid; токены без kid проверяются ключом JWT_SECRET_KEY."""
+        return self.keys.get(kid or DEFAULT_KID)
+
+    @classmethod
+    def get(cls) -> 'KeyRing':
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls.from_settings()
+        return cls._instance
+
+    @classmethod
+    def reload(cls) -> 'KeyRing':
+        """Перечитывает ключи из настроек (ротация без рестарта)."""
+        with cls._lock:
+            cls._instance = cls.from_settings()
+        return cls._instance
+
+    @classmethod
+    def from_settings(cls) -> 'KeyRing':
+        configs: List[Dict] = list(settings.JWT_SIGNING_KEYS)
+        if not any(config.get('kid') == DEFAULT_KID for config in configs):
+            configs.append({
+                'kid': DEFAULT_KID,
+                'alg': settings.JWT_ALGORITHM,
+                'secret': settings.JWT_SECRET_KEY,
+                'status': RETIRING if configs else ACTIVE,
+            })
+
+        keys = {}
+        active_kid = None
+        for config in configs:
+            key = cls._parse(config)
+            if key.kid in keys:
+                raise ImproperlyConfigured(f"Duplicate JWT key id '{key.kid}'")
+            keys[key.kid] = key
+
+            status = config.get('status', RETIRING)
+            if status == ACTIVE:
+                if active_kid is not None:
+                    raise ImproperlyConfigured("Only one JWT signing key can be active")
+                active_kid = key.kid
+            elif status != RETIRING:
+                raise ImproperlyConfigured(f"Unknown JWT key status '{status}'")
+
+        if active_kid is None:
+            raise ImproperlyConfigured("No active JWT signing key configured")
+
+        return cls(keys, active_kid)
+
+    @staticmethod
+    def _parse(config: Dict) -> SigningKey:
+        kid = config.get('kid')
+        algorithm = config.get('alg')
+        if not kid or not algorithm:
+            raise ImproperlyConfigured("JWT key requires 'kid' and 'alg'")
+
+        algorithms = get_default_algorithms()
+        if algorithm not in algorithms:
+            raise ImproperlyConfigured(
+                f"JWT algorithm '{algorithm}' is not available (asymmetric keys require 'cryptography')"
+            )
+        algorithm_obj = algorithms[algorithm]
+
+        if algorithm.startswith('HS'):
+            if not config.get('secret'):
+                raise ImproperlyConfigured(f"JWT key '{kid}' requires 'secret'")
+            secret = algorithm_obj.prepare_key(config['secret'])
+            return SigningKey(kid, algorithm, secret, secret)
+
+        private_key = None
+        if config.get('private_key_path'):
+            private_key = algorithm_obj.prepare_key(Path(config['private_key_path']).read_bytes())
+
+        if config.get('public_key_path'):
+            public_key = algorithm_obj.prepare_key(Path(config['public_key_path']).read_bytes())
+        elif private_key is not None:
+            public_key = private_key.public_key()
+        else:
+            raise ImproperlyConfigured(f"JWT key '{kid}' requires 'private_key_path' or 'public_key_path'")
+
+        if private_key is None and config.get('status') == ACTIVE:
+            raise ImproperlyConfigured(f"Active JWT key '{kid}' requires 'private_key_path'")
+
+        return SigningKey(kid, algorithm, private_key, public_key)
@@ -1,17 +1,29 @@
 """Сервис хеширования и проверки паролей."""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
 import bcrypt
+from django.conf import settings
+from core.exceptions import PasswordHasherBusy
+from core.timing import timed
 
 
 class PasswordService:
     """Хеширование и проверка паролей через bcrypt."""
 
+    _executor = None
+    _slots = None
+    _lock = threading.Lock()
+
     @staticmethod
-    def hash_password(plain_password: str) -> str:
-        """Хеширует пароль."""
+    def hash_password(plain_password: str, rounds: Optional[int] = None) -> str:
+        """Хеширует пароль (rounds передается явно там, где настройки недоступны - в дочерних процессах)."""
         if not plain_password:
             raise ValueError("Password cannot be empty")
 
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
         hashed = bcrypt.hashpw(plain_password.encode('utf-8'), salt)
 
         return hashed.decode('utf-8')
@@ -29,3 +41,87 @@ class PasswordService:
             )
         except (ValueError, AttributeError):
             return False
+
+    @staticmethod
+    def get_rounds(hashed_password: str) -> Optional[int]:
+        """Work factor из bcrypt хеша ($2b$<rounds>$...)."""
+        parts = hashed_password.split('$') if hashed_password else []
+        if len(parts) < 4 or not parts[2].isdigit():
+            return None
+        return int(parts[2])
+
+    @staticmethod
+    def needs_rehash(hashed_password: str) -> bool:
+        """Нужно ли перехешировать пароль под текущий BCRYPT_ROUNDS."""
+        return PasswordService.get_rounds(hashed_password) != settings.BCRYPT_ROUNDS
+
+    @staticmethod
+    def measure_rounds(rounds: int, samples: int = 3) -> float:
+        """Медианное время хеширования (мс) для заданного work factor."""
+        salt = bcrypt.gensalt(rounds=rounds)
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            bcrypt.hashpw(b'calibration-password', salt)
+            timings.append((time.perf_counter() - started) * 1000)
+        return sorted(timings)[len(timings) // 2]
+
+    @staticmethod
+    def calibrate_rounds(target_ms: float, samples: int = 3, min_rounds: int = 4, max_rounds: int = 20) -> Dict[int, float]:
+        """Замеряет время по возрастанию work factor, пока оно не превысит цель."""
+        timings = {}
+        for rounds in range(min_rounds, max_rounds + 1):
+            timings[rounds] = PasswordService.measure_rounds(rounds, samples)
+            if timings[rounds] > target_ms:
+                break
+        return timings
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    workers = settings.PASSWORD_HASHER_WORKERS
+                    cls._slots = threading.BoundedSemaphore(workers + settings.PASSWORD_HASHER_QUEUE_SIZE)
+                    cls._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        return cls._executor
+
+    @classmethod
+    def submit(cls, fn, *args) -> Future:
+        """Ставит bcrypt операцию в выделенный пул (bcrypt отпускает GIL)."""
+        executor = cls._get_executor()
+        if not cls._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            cls._slots.release()
+            raise
+
+        future.add_done_callback(lambda _: cls._slots.release())
+        return future
+
+    @classmethod
+    @timed('bcrypt')
+    def hash_password_pooled(cls, plain_password: str) -> str:
+        """Хеширует пароль в пуле, блокируя только текущий поток."""
+        return cls.submit(cls.hash_password, plain_password).result()
+
+    @classmethod
+    @timed('bcrypt')
+    def verify_password_pooled(cls, plain_password: str, hashed_password: str) -> bool:
+        """Проверяет пароль в пуле, блокируя только текущий поток."""
+        return cls.submit(cls.verify_password, plain_password, hashed_password).result()
+
+    @classmethod
+    @timed('bcrypt')
+    async def ahash_password(cls, plain_password: str) -> str:
+        """Асинхронное хеширование: event loop не блокируется."""
+        return await asyncio.wrap_future(cls.submit(cls.hash_password, plain_password))
+
+    @classmethod
+    @timed('bcrypt')
+    async def averify_password(cls, plain_password: str, hashed_password: str) -> bool:
+        """Асинхронная проверка пароля: event loop не блокируется."""
+        return await asyncio.wrap_future(cls.submit(cls.verify_password, plain_password, hashed_password))
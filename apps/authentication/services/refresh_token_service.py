@@ -0,0 +1,92 @@
+"""Ротация refresh токенов с семействами."""
+import uuid
+from typing import Dict, Optional
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from apps.authentication.models import RefreshToken
+from apps.authentication.services.token_service import TokenService
+from core.exceptions import AuthenticationFailed
+
+
+class RefreshTokenService:
+    """Каждый refresh выдает новый токен; повтор использованного убивает все семейство."""
+
+    @staticmethod
+    def issue(user_id: int, family_id: Optional[str] = None) -> str:
+        """Выдает refresh токен (новое семейство, если family_id не передан)."""
+        record = RefreshTokenService._new_record(user_id, family_id)
+        record.save(force_insert=True)
+        return RefreshTokenService._encode(record)
+
+    @staticmethod
+    async def aissue(user_id: int, family_id: Optional[str] = None) -> str:
+        """Async вариант issue()."""
+        record = RefreshTokenService._new_record(user_id, family_id)
+        await record.asave(force_insert=True)
+        return RefreshTokenService._encode(record)
+
+    @staticmethod
+    def rotate(payload: Dict) -> str:
+        """Помечает токен использованным и выдает следующий в том же семействе."""
+        family_id = payload.get('fam')
+        if not family_id:
+            # Токен выдан до введения ротации: начинаем для него новое семейство
+            return RefreshTokenService.issue(payload['user_id'])
+
+        rotated = RefreshToken.objects.filter(
+            jti=payload.get('jti'),
+            rotated_at__isnull=True
+        ).update(rotated_at=timezone.now())
+
+        if not rotated:
+            RefreshTokenService.revoke_family(family_id)
+            raise AuthenticationFailed("Refresh token reuse detected")
+
+        return RefreshTokenService.issue(payload['user_id'], family_id)
+
+    @staticmethod
+    def revoke_family(family_id: str) -> int:
+        """Удаляет все токены семейства - ни один из них больше не примут."""
+        deleted, _ = RefreshToken.objects.filter(family_id=family_id).delete()
+        return deleted
+
+    @staticmethod
+    def purge_expired(batch_size: int = 5000) -> int:
+        """Удаляет семейства, все токены которых истекли, пакетами."""
+        now = timezone.now()
+        live = RefreshToken.objects.filter(family_id=OuterRef('family_id'), expires_at__gt=now)
+
+        # Кандидаты считаются один раз: диапазон по индексу (expires_at, family_id), живые - по family_id
+        family_ids = list(
+            RefreshToken.objects.filter(expires_at__lte=now)
+            .exclude(Exists(live))
+            .order_by()
+            .values_list('family_id', flat=True)
+            .distinct()
+        )
+
+        total = 0
+        for start in range(0, len(family_ids), batch_size):
+            deleted, _ = RefreshToken.objects.filter(
+                family_id__in=family_ids[start:start + batch_size],
+                expires_at__lte=now
+            ).delete()
+            total += deleted
+        return total
+
+    @staticmethod
+    def _new_record(user_id: int, family_id: Optional[str]) -> RefreshToken:
+        return RefreshToken(
+            jti=uuid.uuid4().hex,
+            family_id=family_id or uuid.uuid4().hex,
+            user_id=user_id,
+            expires_at=timezone.now() + settings.JWT_REFRESH_TOKEN_LIFETIME
+        )
+
+    @staticmethod
+    def _encode(record: RefreshToken) -> str:
+        return TokenService.create_refresh_token(
+            record.user_id,
+            {'jti': record.jti, 'fam': record.family_id}
+        )
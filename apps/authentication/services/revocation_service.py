@@ -0,0 +1,195 @@
+"""Список отозванных токенов с in-memory Bloom фильтром."""
+import hashlib
+import math
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Optional, Set
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+from apps.authentication.models import RevokedToken
+from core.checks import is_shared_cache
+
+
+class BloomFilter:
+    """Bloom фильтр: "точно нет" без ложноотрицательных ответов."""
+    __slots__ = ('capacity', 'size', 'hash_count', 'bits', 'count')
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.size = int(-capacity * math.log(error_rate) / (math.log(2) ** 2)) + 1
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationService:
+    """Отзыв токенов: БД - источник истины, фильтр отсекает подавляющее большинство проверок."""
+    VERSION_CACHE_KEY = 'auth:revocation_version'
+    PRUNE_LOCK_CACHE_KEY = 'auth:revocation_prune'
+    # Запас на расхождение часов и незакоммиченные транзакции при инкрементальной синхронизации
+    SYNC_OVERLAP = timedelta(seconds=30)
+
+    _filter: Optional[BloomFilter] = None
+    _version: Optional[str] = None
+    _synced_at: Optional[datetime] = None
+    # Подтвержденные отзывы: повторная проверка того же токена не идет в БД
+    _revoked: Set[str] = set()
+    _lock = threading.Lock()
+
+    @classmethod
+    def revoke(cls, jti: str, expires_at: datetime) -> None:
+        """Отзывает токен до его истечения."""
+        RevokedToken.objects.bulk_create(
+            [RevokedToken(jti=jti, expires_at=expires_at)],
+            ignore_conflicts=True
+        )
+
+        with cls._lock:
+            if cls._filter is not None:
+                cls._filter.add(jti)
+            cls._revoked.add(jti)
+
+        transaction.on_commit(cls._bump_version)
+        cls.maybe_prune()
+
+    @classmethod
+    def revoke_payload(cls, payload: Dict) -> bool:
+        """Отзывает токен по его payload (нужны jti и exp)."""
+        jti = payload.get('jti')
+        exp = payload.get('exp')
+        if not jti or exp is None:
+            return False
+
+        cls.revoke(jti, datetime.fromtimestamp(exp, tz=dt_timezone.utc))
+        return True
+
+    @classmethod
+    def is_revoked(cls, jti: Optional[str]) -> bool:
+        """Проверка отзыва: в БД только при срабатывании фильтра."""
+        if not jti:
+            return False
+
+        if jti not in cls._current_filter():
+            return False
+        if jti in cls._revoked:
+            return True
+
+        # Отзыв читается только из primary: реплика может еще не знать о нем
+        revoked = RevokedToken.objects.using(DEFAULT_DB_ALIAS).filter(jti=jti, expires_at__gt=timezone.now()).exists()
+        if revoked:
+            cls._revoked.add(jti)
+        return revoked
+
+    @classmethod
+    async def ais_revoked(cls, jti: Optional[str]) -> bool:
+        """Async вариант is_revoked(); в поток уходит только синхронизация фильтра и проверка в БД."""
+        if not jti:
+            return False
+
+        token_filter = cls._filter
+        if token_filter is not None and cls._version == await cls._acurrent_version():
+            if jti not in token_filter:
+                return False
+            if jti in cls._revoked:
+                return True
+
+        return await sync_to_async(cls.is_revoked)(jti)
+
+    @classmethod
+    def prune(cls) -> int:
+        """Удаляет записи об уже истекших токенах."""
+        deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+        return deleted
+
+    @classmethod
+    def maybe_prune(cls) -> None:
+        """Очистка не чаще раза в JWT_REVOCATION_PRUNE_INTERVAL_SECONDS на кластер."""
+        if cache.add(cls.PRUNE_LOCK_CACHE_KEY, True, settings.JWT_REVOCATION_PRUNE_INTERVAL_SECONDS):
+            cls.prune()
+
+    @classmethod
+    def _current_version(cls) -> Optional[str]:
+        if not is_shared_cache():
+            return cls._local_version()
+        return cache.get(cls.VERSION_CACHE_KEY)
+
+    @classmethod
+    async def _acurrent_version(cls) -> Optional[str]:
+        if not is_shared_cache():
+            return cls._local_version()
+        return await cache.aget(cls.VERSION_CACHE_KEY)
+
+    @staticmethod
+    def _local_version() -> str:
+        # Версия в кеше процесса не узнает об отзывах в других воркерах: фильтр досинхронизируется по времени
+        interval = max(settings.JWT_REVOCATION_LOCAL_SYNC_SECONDS, 1)
+        return f'local:{int(time.monotonic() // interval)}'
+
+    @classmethod
+    def _bump_version(cls) -> None:
+        cache.set(cls.VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+
+    @classmethod
+    def _current_filter(cls) -> BloomFilter:
+        version = cls._current_version()
+        if cls._filter is not None and cls._version == version:
+            return cls._filter
+
+        with cls._lock:
+            if cls._filter is None or cls._filter.count >= cls._filter.capacity:
+                cls._rebuild()
+            elif cls._version != version:
+                cls._sync()
+            cls._version = version
+            return cls._filter
+
+    @classmethod
+    def _rebuild(cls) -> None:
+        synced_at = timezone.now()
+        jtis = list(
+            RevokedToken.objects.using(DEFAULT_DB_ALIAS).filter(expires_at__gt=synced_at).values_list('jti', flat=True)
+        )
+
+        token_filter = BloomFilter(
+            max(settings.JWT_REVOCATION_FILTER_CAPACITY, len(jtis) * 2),
+            settings.JWT_REVOCATION_FILTER_ERROR_RATE
+        )
+        for jti in jtis:
+            token_filter.add(jti)
+
+        cls._filter = token_filter
+        cls._revoked = set()
+        cls._synced_at = synced_at
+
+    @classmethod
+    def _sync(cls) -> None:
+        synced_at = timezone.now()
+        jtis = RevokedToken.objects.using(DEFAULT_DB_ALIAS).filter(
+            revoked_at__gte=cls._synced_at - cls.SYNC_OVERLAP,
+            expires_at__gt=synced_at
+        ).values_list('jti', flat=True)
+
+        for jti in jtis:
+            cls._filter.add(jti)
+        cls._synced_at = synced_at
@@ -0,0 +1,204 @@
+"""Ограничение частоты логина и регистрации по IP и email."""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+from core import metrics
+from core.exceptions import TooManyRequests
+
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """'20/min' -> (20, 60)."""
+    limit, period = rate.split('/')
+    return int(limit), PERIODS[period.strip()]
+
+
+class LocalThrottleBackend:
+    """Token bucket в памяти процесса (LRU на MAX_KEYS ключей): для одного воркера."""
+    MAX_KEYS = 100000
+
+    def __init__(self):
+        self._buckets: 'OrderedDict[str, Tuple[float, float, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, period: int) -> Optional[float]:
+        """Списывает попытку; None - разрешено, иначе секунды до следующей."""
+        now = time.monotonic()
+        rate = limit / period
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._evict(now)
+                bucket = (limit, now, now)
+            else:
+                self._buckets.move_to_end(key)
+
+            tokens, updated, _ = bucket
+            tokens = min(limit, tokens + (now - updated) * rate)
+
+            if tokens < 1:
+                self._buckets[key] = (tokens, now, now + (limit - tokens) / rate)
+                return (1 - tokens) / rate
+
+            tokens -= 1
+            self._buckets[key] = (tokens, now, now + (limit - tokens) / rate)
+            return None
+
+    def _evict(self, now: float) -> None:
+        # В начале - давно не использованные ключи: восстановившиеся корзины ничем не отличаются
+        # от отсутствующих, живые вытесняются только при переполнении
+        buckets = self._buckets
+        while buckets:
+            key = next(iter(buckets))
+            if buckets[key][2] > now and len(buckets) < self.MAX_KEYS:
+                break
+            del buckets[key]
+
+    async def ahit(self, key: str, limit: int, period: int) -> Optional[float]:
+        """Async вариант hit(): без I/O, выполняется прямо в event loop."""
+        return self.hit(key, limit, period)
+
+
+class CacheThrottleBackend:
+    """Скользящее окно на двух счетчиках в общем кеше: для нескольких воркеров."""
+
+    def hit(self, key: str, limit: int, period: int) -> Optional[float]:
+        current_key, previous_key, elapsed = self._window(key, period)
+        counts = cache.get_many([current_key, previous_key])
+        wait = self._wait(counts.get(current_key, 0), counts.get(previous_key, 0), elapsed, limit, period)
+        if wait is not None:
+            return wait
+
+        if not cache.add(current_key, 1, period * 2):
+            try:
+                cache.incr(current_key)
+            except ValueError:
+                cache.set(current_key, 1, period * 2)
+        return None
+
+    async def ahit(self, key: str, limit: int, period: int) -> Optional[float]:
+        """Async вариант hit() на async API кеша."""
+        current_key, previous_key, elapsed = self._window(key, period)
+        counts = await cache.aget_many([current_key, previous_key])
+        wait = self._wait(counts.get(current_key, 0), counts.get(previous_key, 0), elapsed, limit, period)
+        if wait is not None:
+            return wait
+
+        if not await cache.aadd(current_key, 1, period * 2):
+            try:
+                await cache.aincr(current_key)
+            except ValueError:
+                await cache.aset(current_key, 1, period * 2)
+        return None
+
+    @staticmethod
+    def _window(key: str, period: int) -> Tuple[str, str, float]:
+        now = time.time()
+        window = int(now // period)
+        return f'throttle:{key}:{window}', f'throttle:{key}:{window - 1}', now / period - window
+
+    @staticmethod
+    def _wait(current: int, previous: int, elapsed: float, limit: int, period: int) -> Optional[float]:
+        if previous * (1 - elapsed) + current < limit:
+            return None
+        if current >= limit or not previous:
+            return (1 - elapsed) * period
+        # Момент, когда вклад прошлого окна упадет ниже остатка лимита
+        return max(0.0, (1 - (limit - current) / previous - elapsed) * period)
+
+
+class ThrottleService:
+    """Проверки лимитов до любой работы с БД и bcrypt."""
+    _backend = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def check_login(cls, request) -> None:
+        """Лимиты логина по IP и по email из тела запроса."""
+        cls._check('login_ip', get_client_ip(request), settings.LOGIN_THROTTLE_IP_RATE)
+
+        email = get_request_email(request)
+        if email:
+            cls._check('login_email', email, settings.LOGIN_THROTTLE_EMAIL_RATE)
+
+    @classmethod
+    def check_register(cls, request) -> None:
+        """Лимиты регистрации по IP и по email из тела запроса."""
+        cls._check('register_ip', get_client_ip(request), settings.REGISTER_THROTTLE_IP_RATE)
+
+        email = get_request_email(request)
+        if email:
+            cls._check('register_email', email, settings.REGISTER_THROTTLE_EMAIL_RATE)
+
+    @classmethod
+    async def acheck_login(cls, request) -> None:
+        """Async вариант check_login()."""
+        await cls._acheck('login_ip', get_client_ip(request), settings.LOGIN_THROTTLE_IP_RATE)
+
+        email = get_request_email(request)
+        if email:
+            await cls._acheck('login_email', email, settings.LOGIN_THROTTLE_EMAIL_RATE)
+
+    @classmethod
+    def get_backend(cls):
+        if cls._backend is None:
+            with cls._lock:
+                if cls._backend is None:
+                    cls._backend = import_string(settings.LOGIN_THROTTLE_BACKEND)()
+        return cls._backend
+
+    @classmethod
+    def _check(cls, scope: str, ident: str, rate: str) -> None:
+        if not settings.LOGIN_THROTTLE_ENABLED or not rate:
+            return
+
+        limit, period = parse_rate(rate)
+        wait = cls.get_backend().hit(cls._key(scope, ident), limit, period)
+        cls._raise_if_throttled(scope, wait)
+
+    @classmethod
+    async def _acheck(cls, scope: str, ident: str, rate: str) -> None:
+        if not settings.LOGIN_THROTTLE_ENABLED or not rate:
+            return
+
+        limit, period = parse_rate(rate)
+        wait = await cls.get_backend().ahit(cls._key(scope, ident), limit, period)
+        cls._raise_if_throttled(scope, wait)
+
+    @staticmethod
+    def _key(scope: str, ident: str) -> str:
+        return f"{scope}:{hashlib.sha256(ident.encode('utf-8')).hexdigest()[:32]}"
+
+    @staticmethod
+    def _raise_if_throttled(scope: str, wait: Optional[float]) -> None:
+        if wait is not None:
+            metrics.inc('auth_throttled_total', scope=scope)
+            raise TooManyRequests(wait=wait)
+
+
+def get_request_email(request) -> Optional[str]:
+    """Email из тела запроса в нижнем регистре (None - не передан)."""
+    email = request.data.get('email') if isinstance(request.data, dict) else None
+    if isinstance(email, str) and email.strip():
+        return email.strip().lower()
+    return None
+
+
+def get_client_ip(request) -> str:
+    """IP клиента; X-Forwarded-For учитывается только за LOGIN_THROTTLE_NUM_PROXIES прокси."""
+    num_proxies = settings.LOGIN_THROTTLE_NUM_PROXIES
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+
+    if num_proxies and forwarded:
+        addresses = [address.strip() for address in forwarded.split(',')]
+        return addresses[-min(num_proxies, len(addresses))]
+
+    return request.META.get('REMOTE_ADDR', '')
@@ -0,0 +1,116 @@
+"""Кеш проверенных JWT токенов."""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+from django.conf import settings
+
+
+class _Entry:
+    __slots__ = ('principal', 'payload', 'expires_at')
+
+    def __init__(self, principal: Any, payload: Dict, expires_at: float):
+        self.principal = principal
+        self.payload = payload
+        self.expires_at = expires_at
+
+
+class TokenCache:
+    """Ограниченный LRU кеш: digest токена -> (principal, payload)."""
+
+    _entries: 'OrderedDict[bytes, _Entry]' = OrderedDict()
+    _user_index: Dict[int, Set[bytes]] = {}
+    _lock = threading.Lock()
+
+    hits = 0
+    misses = 0
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    @classmethod
+    def get(cls, token: str) -> Optional[Tuple[Any, Dict]]:
+        """Возвращает закешированную пару (principal, payload) или None."""
+        if settings.JWT_TOKEN_CACHE_SIZE <= 0:
+            return None
+
+        key = cls.digest(token)
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry is None:
+                cls.misses += 1
+                return None
+
+            if entry.expires_at <= time.time():
+                cls._remove(key, entry)
+                cls.misses += 1
+                return None
+
+            cls._entries.move_to_end(key)
+            cls.hits += 1
+            return entry.principal, entry.payload
+
+    @classmethod
+    def set(cls, token: str, principal: Any, payload: Dict) -> None:
+        """Кеширует проверенный токен до exp или TTL, что наступит раньше."""
+        max_size = settings.JWT_TOKEN_CACHE_SIZE
+        if max_size <= 0:
+            return
+
+        expires_at = time.time() + settings.JWT_TOKEN_CACHE_TTL_SECONDS
+        exp = payload.get('exp')
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+
+        key = cls.digest(token)
+        entry = _Entry(principal, payload, expires_at)
+        with cls._lock:
+            old = cls._entries.pop(key, None)
+            if old is not None:
+                cls._unindex(key, old)
+
+            cls._entries[key] = entry
+            cls._user_index.setdefault(payload.get('user_id'), set()).add(key)
+
+            while len(cls._entries) > max_size:
+                old_key, old_entry = cls._entries.popitem(last=False)
+                cls._unindex(old_key, old_entry)
+
+    @classmethod
+    def invalidate_user(cls, user_id: int) -> None:
+        """Удаляет все токены пользователя."""
+        with cls._lock:
+            for key in cls._user_index.pop(user_id, ()):
+                cls._entries.pop(key, None)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._entries.clear()
+            cls._user_index.clear()
+
+    @classmethod
+    def stats(cls) -> Dict[str, int]:
+        """Счетчики попаданий для подбора размера кеша."""
+        return {
+            'hits': cls.hits,
+            'misses': cls.misses,
+            'size': len(cls._entries),
+            'max_size': settings.JWT_TOKEN_CACHE_SIZE,
+        }
+
+    @classmethod
+    def _remove(cls, key: bytes, entry: _Entry) -> None:
+        cls._entries.pop(key, None)
+        cls._unindex(key, entry)
+
+    @classmethod
+    def _unindex(cls, key: bytes, entry: _Entry) -> None:
+        user_id = entry.payload.get('user_id')
+        keys = cls._user_index.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del cls._user_index[user_id]
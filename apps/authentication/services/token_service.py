@@ -1,57 +1,73 @@
 """Сервис генерации и валидации JWT токенов."""
+import uuid
 import jwt
 from datetime import datetime, timedelta
 from django.conf import settings
 from typing import Dict, Optional
+from apps.authentication.services.key_ring import KeyRing
+from core.timing import timed
 
 
 class TokenService:
     """Создание и декодирование JWT токенов."""
 
     @staticmethod
-    def create_access_token(user_id: int) -> str:
-        """Создает access токен."""
+    def create_access_token(user_id: int, claims: Optional[Dict] = None) -> str:
+        """Создает access токен (claims - дополнительные поля профиля токена)."""
         payload = {
             'user_id': user_id,
             'exp': datetime.utcnow() + settings.JWT_ACCESS_TOKEN_LIFETIME,
             'iat': datetime.utcnow(),
-            'type': 'access'
+            'type': 'access',
+            'jti': uuid.uuid4().hex
         }
 
-        token = jwt.encode(
-            payload,
-            settings.JWT_SECRET_KEY,
-            algorithm=settings.JWT_ALGORITHM
-        )
+        if claims:
+            payload.update(claims)
 
-        return token
+        return TokenService.encode(payload)
 
     @staticmethod
-    def create_refresh_token(user_id: int) -> str:
-        """Создает refresh токен."""
+    def create_refresh_token(user_id: int, claims: Optional[Dict] = None) -> str:
+        """Создает refresh токен (claims - jti/семейство ротации)."""
         payload = {
             'user_id': user_id,
             'exp': datetime.utcnow() + settings.JWT_REFRESH_TOKEN_LIFETIME,
             'iat': datetime.utcnow(),
-            'type': 'refresh'
+            'type': 'refresh',
+            'jti': uuid.uuid4().hex
         }
 
-        token = jwt.encode(
+        if claims:
+            payload.update(claims)
+
+        return TokenService.encode(payload)
+
+    @staticmethod
+    @timed('jwt_encode')
+    def encode(payload: Dict) -> str:
+        """Подписывает payload активным ключом (kid в заголовке)."""
+        key = KeyRing.get().active
+        return jwt.encode(
             payload,
-            settings.JWT_SECRET_KEY,
-            algorithm=settings.JWT_ALGORITHM
+            key.signing_key,
+            algorithm=key.algorithm,
+            headers={'kid': key.kid}
         )
 
-        return token
-
     @staticmethod
+    @timed('jwt_decode')
     def decode_token(token: str) -> Optional[Dict]:
         """Декодирует и валидирует токен."""
         try:
+            key = KeyRing.get().find(jwt.get_unverified_header(token).get('kid'))
+            if key is None:
+                raise jwt.InvalidTokenError("Unknown key id")
+
             payload = jwt.decode(
                 token,
-                settings.JWT_SECRET_KEY,
-                algorithms=[settings.JWT_ALGORITHM]
+                key.verifying_key,
+                algorithms=[key.algorithm]
             )
             return payload
         except jwt.ExpiredSignatureError:
@@ -60,9 +76,9 @@ class TokenService:
             raise jwt.InvalidTokenError("Invalid token")
 
     @staticmethod
-    def create_tokens(user_id: int) -> Dict[str, str]:
+    def create_tokens(user_id: int, claims: Optional[Dict] = None) -> Dict[str, str]:
         """Создает access и refresh токены."""
         return {
-            'access_token': TokenService.create_access_token(user_id),
+            'access_token': TokenService.create_access_token(user_id, claims),
             'refresh_token': TokenService.create_refresh_token(user_id)
         }
\ No newline at end of file
@@ -1 +1,331 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+from unittest import mock
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.utils import timezone
+from apps.authentication.models import RefreshToken, RevokedToken
+from apps.authentication.async_views import AsyncLoginView
+from apps.authentication.services.auth_service import AuthService
+from apps.authentication.services.key_ring import KeyRing
+from apps.authentication.services.password_service import PasswordService
+from apps.authentication.services.refresh_token_service import RefreshTokenService
+from apps.authentication.services.revocation_service import RevocationService
+from apps.authentication.services.throttle_service import CacheThrottleBackend, ThrottleService
+from apps.authentication.services.token_service import TokenService
+from apps.permissions.services.rbac_index import RBACIndex
+from apps.users.models import User
+from core.exceptions import AuthenticationFailed, PasswordHasherBusy, ValidationError
+
+
+@override_settings(BCRYPT_ROUNDS=4)
+class RevocationTests(TestCase):
+    """Отзыв токенов после logout и деактивации."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email='revoke@test.com',
+            password=PasswordService.hash_password('Secret123!', rounds=4),
+            first_name='Revoke',
+            last_name='Test'
+        )
+
+    def login(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return AuthService.login('revoke@test.com', 'Secret123!')
+
+    def test_access_token_rejected_after_logout(self):
+        tokens = self.login()
+        result = AuthService.authenticate_token(tokens['access_token'])
+        self.assertIsNotNone(result)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AuthService.logout(result[1])
+
+        self.assertIsNone(AuthService.authenticate_token(tokens['access_token']))
+
+    def test_refresh_token_rejected_after_logout(self):
+        tokens = self.login()
+        payload = TokenService.decode_token(tokens['access_token'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AuthService.logout(payload, tokens['refresh_token'])
+
+        with self.assertRaises(AuthenticationFailed):
+            AuthService.refresh_access_token(tokens['refresh_token'])
+
+    def test_access_token_rejected_after_deactivate(self):
+        tokens = self.login()
+        self.assertIsNotNone(AuthService.authenticate_token(tokens['access_token']))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AuthService.deactivate_user(self.user.id)
+
+        self.assertIsNone(AuthService.authenticate_token(tokens['access_token']))
+
+    def test_deactivate_keeps_policy_version(self):
+        version = RBACIndex.current_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            AuthService.deactivate_user(self.user.id)
+        self.assertEqual(RBACIndex.current_version(), version)
+
+    def test_token_issued_after_reactivation_accepted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            AuthService.deactivate_user(self.user.id)
+        User.objects.filter(id=self.user.id).update(is_active=True)
+
+        # Деактивация была раньше, чем начинается секунда выпуска нового токена
+        key = AuthService._invalidated_key(self.user.id)
+        cache.set(key, cache.get(key) - 2)
+
+        token = TokenService.create_access_token(self.user.id)
+        self.assertIsNotNone(AuthService.authenticate_token(token))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_revocation_from_another_process_seen_after_local_sync(self):
+        tokens = self.login()
+        payload = TokenService.decode_token(tokens['access_token'])
+        self.assertFalse(RevocationService.is_revoked(payload['jti']))
+
+        # Запись другого воркера: версия в его кеше процесса сюда не доходит, фильтр догоняет ее по времени
+        RevokedToken.objects.create(jti=payload['jti'], expires_at=timezone.now() + timedelta(minutes=5))
+
+        later = time.monotonic() + settings.JWT_REVOCATION_LOCAL_SYNC_SECONDS
+        with mock.patch('apps.authentication.services.revocation_service.time.monotonic', return_value=later):
+            self.assertTrue(RevocationService.is_revoked(payload['jti']))
+            self.assertIsNone(AuthService.authenticate_token(tokens['access_token']))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_local_cache_checks_revocation_without_db(self):
+        tokens = self.login()
+        access = TokenService.decode_token(tokens['access_token'])
+        refresh = TokenService.decode_token(tokens['refresh_token'])
+        RevocationService.is_revoked(access['jti'])
+        RevocationService.revoke_payload(refresh)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(RevocationService.is_revoked(access['jti']))
+            self.assertTrue(RevocationService.is_revoked(refresh['jti']))
+
+class RefreshTokenTests(TestCase):
+    """Ротация refresh токенов и отзыв семейства при повторе."""
+
+    def setUp(self):
+        self.user = User.objects.create(email='rotate@test.com', password='-', first_name='Rotate', last_name='Test')
+
+    def test_reuse_revokes_family(self):
+        first = RefreshTokenService.issue(self.user.id)
+        second = AuthService.refresh_access_token(first)['refresh_token']
+        family_id = TokenService.decode_token(first)['fam']
+
+        with self.assertRaises(AuthenticationFailed):
+            AuthService.refresh_access_token(first)
+
+        self.assertFalse(RefreshToken.objects.filter(family_id=family_id).exists())
+        with self.assertRaises(AuthenticationFailed):
+            AuthService.refresh_access_token(second)
+
+    def test_purge_expired_keeps_live_families(self):
+        expired = RefreshTokenService.issue(self.user.id)
+        partly_live = RefreshTokenService.issue(self.user.id)
+        expired_family = TokenService.decode_token(expired)['fam']
+        live_family = TokenService.decode_token(partly_live)['fam']
+
+        past = timezone.now() - timedelta(days=1)
+        RefreshToken.objects.filter(family_id=expired_family).update(expires_at=past)
+        RefreshToken.objects.create(jti='old', family_id=live_family, user=self.user, expires_at=past)
+
+        self.assertEqual(RefreshTokenService.purge_expired(batch_size=1), 1)
+        self.assertFalse(RefreshToken.objects.filter(family_id=expired_family).exists())
+        self.assertEqual(RefreshToken.objects.filter(family_id=live_family).count(), 2)
+
+
+@override_settings(BCRYPT_ROUNDS=4)
+class RegisterTests(TestCase):
+    """Регистрация: конфликт email отличается от прочих ошибок БД."""
+
+    def register(self, email):
+        return AuthService.register(email, 'Secret123!', 'Register', 'Test')
+
+    def test_duplicate_email_rejected(self):
+        self.register('dup@test.com')
+        with self.assertRaisesMessage(ValidationError, 'already exists'):
+            self.register('dup@test.com')
+
+    def test_other_integrity_errors_propagate(self):
+        with mock.patch.object(User, 'save', side_effect=IntegrityError('NOT NULL constraint failed')):
+            with self.assertRaises(IntegrityError):
+                self.register('new@test.com')
+
+
+@override_settings(BCRYPT_ROUNDS=5)
+class LoginRehashTests(TestCase):
+    """Попутное перехеширование при логине."""
+
+    def setUp(self):
+        self.user = User.objects.create(
+            email='rehash@test.com',
+            password=PasswordService.hash_password('Secret123!', rounds=4),
+            first_name='Rehash',
+            last_name='Test'
+        )
+
+    def test_rehash_upgrades_work_factor(self):
+        AuthService.login('rehash@test.com', 'Secret123!')
+        self.user.refresh_from_db()
+        self.assertEqual(PasswordService.get_rounds(self.user.password), 5)
+
+    def test_busy_hasher_does_not_fail_login(self):
+        with mock.patch.object(PasswordService, 'hash_password_pooled', side_effect=PasswordHasherBusy()):
+            result = AuthService.login('rehash@test.com', 'Secret123!')
+
+        self.assertIn('access_token', result)
+        self.user.refresh_from_db()
+        self.assertEqual(PasswordService.get_rounds(self.user.password), 4)
+
+
+@override_settings(BCRYPT_ROUNDS=4)
+class AsyncAuthTests(TestCase):
+    """Async путь аутентификации без синхронного ORM в event loop."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email='async@test.com',
+            password=PasswordService.hash_password('Secret123!', rounds=4),
+            first_name='Async',
+            last_name='Test'
+        )
+
+    async def test_principal_requires_explicit_user_load(self):
+        tokens = await AuthService.alogin('async@test.com', 'Secret123!')
+        principal, _ = await AuthService.aauthenticate_token(tokens['access_token'])
+
+        with self.assertRaises(AttributeError):
+            principal.first_name
+
+        await principal.aget_user()
+        self.assertEqual(principal.first_name, 'Async')
+
+
+class KeyRingTests(TestCase):
+    """Ротация ключей подписи: kid в заголовке, проверка выводимым ключом."""
+
+    OLD = {'kid': 'k1', 'alg': 'HS256', 'secret': 'old-secret-' + 'x' * 32}
+    NEW = {'kid': 'k2', 'alg': 'HS256', 'secret': 'new-secret-' + 'y' * 32}
+
+    def setUp(self):
+        self.addCleanup(setattr, KeyRing, '_instance', None)
+
+    def use_keys(self, *keys):
+        with override_settings(JWT_SIGNING_KEYS=list(keys)):
+            KeyRing.reload()
+
+    def test_token_signed_with_active_kid(self):
+        self.use_keys({**self.OLD, 'status': 'active'})
+        token = TokenService.create_access_token(1)
+
+        self.assertEqual(jwt.get_unverified_header(token)['kid'], 'k1')
+        self.assertEqual(TokenService.decode_token(token)['user_id'], 1)
+
+    def test_rotation_keeps_retiring_key_for_verification(self):
+        self.use_keys({**self.OLD, 'status': 'active'})
+        old_token = TokenService.create_access_token(1)
+
+        self.use_keys({**self.OLD, 'status': 'retiring'}, {**self.NEW, 'status': 'active'})
+        new_token = TokenService.create_access_token(1)
+        self.assertEqual(jwt.get_unverified_header(new_token)['kid'], 'k2')
+        self.assertEqual(TokenService.decode_token(old_token)['user_id'], 1)
+
+        self.use_keys({**self.NEW, 'status': 'active'})
+        with self.assertRaises(jwt.InvalidTokenError):
+            TokenService.decode_token(old_token)
+        self.assertEqual(TokenService.decode_token(new_token)['user_id'], 1)
+
+    def test_token_without_kid_uses_default_secret(self):
+        self.use_keys({**self.NEW, 'status': 'active'})
+        legacy = jwt.encode({'user_id': 1, 'type': 'access'}, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+        self.assertEqual(TokenService.decode_token(legacy)['user_id'], 1)
+
+    def test_unknown_kid_rejected(self):
+        self.use_keys({**self.OLD, 'status': 'active'})
+        forged = jwt.encode({'user_id': 1}, self.NEW['secret'], algorithm='HS256', headers={'kid': 'k9'})
+
+        with self.assertRaises(jwt.InvalidTokenError):
+            TokenService.decode_token(forged)
+
+
+@override_settings(
+    LOGIN_THROTTLE_ENABLED=True,
+    LOGIN_THROTTLE_BACKEND='apps.authentication.services.throttle_service.LocalThrottleBackend',
+    LOGIN_THROTTLE_IP_RATE='3/min',
+    LOGIN_THROTTLE_EMAIL_RATE='2/min'
+)
+class ThrottleTests(TestCase):
+    """Лимиты логина по IP и email с Retry-After."""
+
+    def setUp(self):
+        cache.clear()
+        ThrottleService._backend = None
+        self.addCleanup(setattr, ThrottleService, '_backend', None)
+
+    def login(self, email, ip='10.0.0.1'):
+        return self.client.post(
+            '/api/auth/login/',
+            {'email': email, 'password': 'wrong-password'},
+            content_type='application/json',
+            REMOTE_ADDR=ip
+        )
+
+    def test_ip_limit_returns_retry_after(self):
+        statuses = [self.login(f'user{i}@test.com').status_code for i in range(3)]
+        self.assertNotIn(429, statuses)
+
+        response = self.login('user9@test.com')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        self.assertLessEqual(int(response['Retry-After']), 20)
+
+        self.assertNotEqual(self.login('user9@test.com', ip='10.0.0.2').status_code, 429)
+
+    def test_email_limit_across_ips(self):
+        for i in range(2):
+            self.assertNotEqual(self.login('target@test.com', ip=f'10.0.1.{i}').status_code, 429)
+
+        self.assertEqual(self.login('Target@test.com ', ip='10.0.1.9').status_code, 429)
+
+    @override_settings(LOGIN_THROTTLE_ENABLED=False)
+    def test_disabled(self):
+        self.assertNotIn(429, [self.login('user@test.com').status_code for _ in range(5)])
+
+    def test_cache_backend_sliding_window(self):
+        backend = CacheThrottleBackend()
+        self.assertEqual([backend.hit('scope:key', 3, 60) for _ in range(3)], [None] * 3)
+
+        wait = backend.hit('scope:key', 3, 60)
+        self.assertIsNotNone(wait)
+        self.assertGreater(wait, 0)
+        self.assertLessEqual(wait, 60)
+
+    async def test_async_login_view_throttled(self):
+        view = AsyncLoginView.as_view()
+
+        async def login():
+            return await view(AsyncRequestFactory().post(
+                '/api/auth/login/',
+                {'email': 'async@test.com', 'password': 'wrong-password'},
+                content_type='application/json',
+                REMOTE_ADDR='10.0.2.1'
+            ))
+
+        for _ in range(2):
+            self.assertNotEqual((await login()).status_code, 429)
+
+        response = await login()
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
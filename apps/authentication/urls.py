@@ -1,7 +1,9 @@
 """
 URL configuration for authentication app.
 """
+from django.conf import settings
 from django.urls import path
+from apps.authentication.async_views import AsyncLoginView, AsyncRefreshTokenView
 from apps.authentication.views import (
     RegisterView,
     LoginView,
@@ -11,6 +13,9 @@ from apps.authentication.views import (
 
 app_name = 'authentication'
 
+if settings.ASYNC_API:
+    LoginView, RefreshTokenView = AsyncLoginView, AsyncRefreshTokenView
+
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
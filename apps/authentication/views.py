@@ -9,14 +9,25 @@ from apps.authentication.serializers import (
     UserSerializer
 )
 from apps.authentication.services.auth_service import AuthService
+from apps.authentication.services.throttle_service import ThrottleService
 from core.response import success_response, error_response
-from core.exceptions import AuthenticationFailed, ValidationError, UserInactive
+from core.exceptions import AuthenticationFailed, ValidationError, UserInactive, PasswordHasherBusy, TooManyRequests
 
 
 class RegisterView(APIView):
     """Регистрация пользователя."""
 
     def post(self, request):
+        try:
+            ThrottleService.check_register(request)
+        except TooManyRequests as e:
+            response = error_response(
+                message=str(e),
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+            response['Retry-After'] = str(e.wait)
+            return response
+
         serializer = RegisterSerializer(data=request.data)
 
         if not serializer.is_valid():
@@ -48,6 +59,11 @@ class RegisterView(APIView):
                 message=str(e),
                 status_code=status.HTTP_400_BAD_REQUEST
             )
+        except PasswordHasherBusy as e:
+            return error_response(
+                message=str(e),
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
         except Exception as e:
             return error_response(
                 message="Registration failed",
@@ -60,6 +76,16 @@ class LoginView(APIView):
     """Вход пользователя."""
 
     def post(self, request):
+        try:
+            ThrottleService.check_login(request)
+        except TooManyRequests as e:
+            response = error_response(
+                message=str(e),
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+            response['Retry-After'] = str(e.wait)
+            return response
+
         serializer = LoginSerializer(data=request.data)
 
         if not serializer.is_valid():
@@ -93,6 +119,11 @@ class LoginView(APIView):
                 message=str(e),
                 status_code=status.HTTP_401_UNAUTHORIZED
             )
+        except PasswordHasherBusy as e:
+            return error_response(
+                message=str(e),
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
         except Exception as e:
             return error_response(
                 message="Login failed",
@@ -139,10 +170,23 @@ class RefreshTokenView(APIView):
 
 
 class LogoutView(APIView):
-    """Выход пользователя (JWT stateless - удаление токенов на клиенте)."""
+    """Выход пользователя: отзыв access токена и, если передан, refresh токена."""
 
     def post(self, request):
+        access_payload = request.auth if isinstance(request.auth, dict) else None
+
+        try:
+            AuthService.logout(
+                access_payload=access_payload,
+                refresh_token=request.data.get('refresh_token')
+            )
+        except AuthenticationFailed as e:
+            return error_response(
+                message=str(e),
+                status_code=status.HTTP_401_UNAUTHORIZED
+            )
+
         return success_response(
-            message="Logout successful. Please delete tokens on client side.",
+            message="Logout successful",
             status_code=status.HTTP_200_OK
         )
@@ -0,0 +1,147 @@
+"""Async mock API для демонстрации RBAC под ASGI."""
+from rest_framework import status
+from apps.authentication.async_views import AsyncAPIView
+from apps.mock_resources.views import MOCK_PRODUCTS, MOCK_ORDERS
+from apps.permissions.decorators.permission_required import apermission_required
+from core.response import json_success_response
+
+
+def _find(items, item_id):
+    return next((item for item in items if item['id'] == int(item_id)), None)
+
+
+def _not_found(message):
+    return json_success_response(
+        data=None,
+        message=message,
+        status_code=status.HTTP_404_NOT_FOUND
+    )
+
+
+class AsyncProductListView(AsyncAPIView):
+    """Список продуктов (async)."""
+
+    @apermission_required('products', 'read')
+    async def get(self, request):
+        return json_success_response(
+            data={'products': MOCK_PRODUCTS},
+            message="Products retrieved successfully"
+        )
+
+    @apermission_required('products', 'create')
+    async def post(self, request):
+        new_product = {
+            "id": len(MOCK_PRODUCTS) + 1,
+            "name": request.data.get('name', 'New Product'),
+            "price": request.data.get('price', 0),
+            "created_by_id": request.user.id
+        }
+
+        return json_success_response(
+            data={'product': new_product},
+            message="Product created successfully (mock)",
+            status_code=status.HTTP_201_CREATED
+        )
+
+
+class AsyncProductDetailView(AsyncAPIView):
+    """Детали продукта (async)."""
+
+    @apermission_required('products', 'read')
+    async def get(self, request, product_id):
+        product = _find(MOCK_PRODUCTS, product_id)
+        if not product:
+            return _not_found("Product not found")
+
+        return json_success_response(
+            data={'product': product},
+            message="Product retrieved successfully"
+        )
+
+    @apermission_required('products', 'update', check_ownership=True)
+    async def patch(self, request, product_id):
+        product = _find(MOCK_PRODUCTS, product_id)
+        if not product:
+            return _not_found("Product not found")
+
+        product_copy = product.copy()
+        product_copy['name'] = request.data.get('name', product['name'])
+        product_copy['price'] = request.data.get('price', product['price'])
+
+        return json_success_response(
+            data={'product': product_copy},
+            message="Product updated successfully (mock)"
+        )
+
+    @apermission_required('products', 'delete', check_ownership=True)
+    async def delete(self, request, product_id):
+        if not _find(MOCK_PRODUCTS, product_id):
+            return _not_found("Product not found")
+
+        return json_success_response(
+            message="Product deleted successfully (mock)"
+        )
+
+
+class AsyncOrderListView(AsyncAPIView):
+    """Список заказов (async)."""
+
+    @apermission_required('orders', 'read')
+    async def get(self, request):
+        return json_success_response(
+            data={'orders': MOCK_ORDERS},
+            message="Orders retrieved successfully"
+        )
+
+    @apermission_required('orders', 'create')
+    async def post(self, request):
+        new_order = {
+            "id": len(MOCK_ORDERS) + 1,
+            "product": request.data.get('product', 'Unknown'),
+            "quantity": request.data.get('quantity', 1),
+            "created_by_id": request.user.id
+        }
+
+        return json_success_response(
+            data={'order': new_order},
+            message="Order created successfully (mock)",
+            status_code=status.HTTP_201_CREATED
+        )
+
+
+class AsyncOrderDetailView(AsyncAPIView):
+    """Детали заказа (async)."""
+
+    @apermission_required('orders', 'read', check_ownership=True)
+    async def get(self, request, order_id):
+        order = _find(MOCK_ORDERS, order_id)
+        if not order:
+            return _not_found("Order not found")
+
+        return json_success_response(
+            data={'order': order},
+            message="Order retrieved successfully"
+        )
+
+    @apermission_required('orders', 'update', check_ownership=True)
+    async def patch(self, request, order_id):
+        order = _find(MOCK_ORDERS, order_id)
+        if not order:
+            return _not_found("Order not found")
+
+        order_copy = order.copy()
+        order_copy['quantity'] = request.data.get('quantity', order['quantity'])
+
+        return json_success_response(
+            data={'order': order_copy},
+            message="Order updated successfully (mock)"
+        )
+
+    @apermission_required('orders', 'delete', check_ownership=True)
+    async def delete(self, request, order_id):
+        if not _find(MOCK_ORDERS, order_id):
+            return _not_found("Order not found")
+
+        return json_success_response(
+            message="Order deleted successfully (mock)"
+        )
@@ -1,5 +1,12 @@
 """URL configuration for mock resources app."""
+from django.conf import settings
 from django.urls import path
+from apps.mock_resources.async_views import (
+    AsyncProductListView,
+    AsyncProductDetailView,
+    AsyncOrderListView,
+    AsyncOrderDetailView
+)
 from apps.mock_resources.views import (
     ProductListView,
     ProductDetailView,
@@ -9,6 +16,10 @@ from apps.mock_resources.views import (
 
 app_name = 'mock_resources'
 
+if settings.ASYNC_API:
+    ProductListView, ProductDetailView = AsyncProductListView, AsyncProductDetailView
+    OrderListView, OrderDetailView = AsyncOrderListView, AsyncOrderDetailView
+
 urlpatterns = [
     path('products/', ProductListView.as_view(), name='product-list'),
     path('products/<int:product_id>/', ProductDetailView.as_view(), name='product-detail'),
@@ -5,3 +5,7 @@ class PermissionsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.permissions"
     verbose_name = "Permissions & RBAC"
+
+    def ready(self):
+        from apps.permissions import signals  # noqa: F401
+        from core import checks  # noqa: F401
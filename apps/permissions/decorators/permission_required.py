@@ -2,7 +2,16 @@
 from functools import wraps
 from rest_framework import status
 from apps.permissions.services.permission_service import PermissionService
-from core.response import error_response
+from core import metrics
+from core.response import error_response, json_error_response
+
+
+def _get_resource_owner_id(request, kwargs):
+    return (
+        getattr(request, 'resource_owner_id', None) or
+        request.data.get('owner_id') or
+        kwargs.get('owner_id')
+    )
 
 
 def permission_required(resource_code: str, action: str, check_ownership: bool = False):
@@ -18,20 +27,20 @@ def permission_required(resource_code: str, action: str, check_ownership: bool =
 
             resource_owner_id = None
             if check_ownership:
-                resource_owner_id = (
-                    getattr(request, 'resource_owner_id', None) or
-                    request.data.get('owner_id') or
-                    kwargs.get('owner_id')
-                )
+                resource_owner_id = _get_resource_owner_id(request, kwargs)
+
+            claims = request.auth if isinstance(request.auth, dict) else None
 
             has_permission = PermissionService.check_permission(
                 user=request.user,
                 resource_code=resource_code,
                 action=action,
-                resource_owner_id=resource_owner_id
+                resource_owner_id=resource_owner_id,
+                claims=claims
             )
 
             if not has_permission:
+                metrics.inc('rbac_forbidden_responses_total', element=resource_code)
                 return error_response(
                     message=f"You do not have permission to {action} {resource_code}",
                     status_code=status.HTTP_403_FORBIDDEN
@@ -40,4 +49,40 @@ def permission_required(resource_code: str, action: str, check_ownership: bool =
             return view_func(view_instance, request, *args, **kwargs)
 
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
+
+
+def apermission_required(resource_code: str, action: str, check_ownership: bool = False):
+    """Async вариант permission_required для AsyncAPIView."""
+    def decorator(view_func):
+        @wraps(view_func)
+        async def wrapper(view_instance, request, *args, **kwargs):
+            if not request.user or not request.user.is_authenticated:
+                return json_error_response(
+                    message="Authentication required",
+                    status_code=status.HTTP_401_UNAUTHORIZED
+                )
+
+            resource_owner_id = None
+            if check_ownership:
+                resource_owner_id = _get_resource_owner_id(request, kwargs)
+
+            has_permission = await PermissionService.acheck_permission(
+                user=request.user,
+                resource_code=resource_code,
+                action=action,
+                resource_owner_id=resource_owner_id,
+                claims=request.auth
+            )
+
+            if not has_permission:
+                metrics.inc('rbac_forbidden_responses_total', element=resource_code)
+                return json_error_response(
+                    message=f"You do not have permission to {action} {resource_code}",
+                    status_code=status.HTTP_403_FORBIDDEN
+                )
+
+            return await view_func(view_instance, request, *args, **kwargs)
+
+        return wrapper
+    return decorator
@@ -0,0 +1,18 @@
+"""Пересборка материализованных эффективных прав."""
+import time
+from django.core.management.base import BaseCommand
+from apps.permissions.services.effective_permission_service import EffectivePermissionService
+from apps.permissions.services.rbac_index import RBACIndex
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the user_effective_permissions table from user roles and access rules'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        created = EffectivePermissionService.rebuild()
+        RBACIndex.bump_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Rebuilt {created} effective permissions in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,16 @@
+"""Пересборка замыкания иерархии ролей."""
+import time
+from django.core.management.base import BaseCommand
+from apps.permissions.services.role_hierarchy_service import RoleHierarchyService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the role_closure table from role parents and recompute effective permissions'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        created = RoleHierarchyService.rebuild()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Rebuilt {created} role closure rows in {time.perf_counter() - started:.2f}s"
+        ))
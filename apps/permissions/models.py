@@ -1,5 +1,5 @@
 """RBAC модели."""
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 
 
@@ -8,6 +8,8 @@ class Role(models.Model):
     name = models.CharField(max_length=50, unique=True, db_index=True)
     description = models.TextField(blank=True)
     is_system = models.BooleanField(default=False)
+    # Роль наследует правила родителя и всех его предков
+    parent = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='children')
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -19,6 +21,20 @@ class Role(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        """Сохраняет роль; при смене parent обновляет замыкание иерархии, циклы отклоняются."""
+        from apps.permissions.services.role_hierarchy_service import RoleHierarchyService
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'parent' not in update_fields:
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            moved = RoleHierarchyService.prepare_move(self)
+            super().save(*args, **kwargs)
+            if moved:
+                RoleHierarchyService.move(self)
+
 
 class BusinessElement(models.Model):
     """Бизнес-элементы (ресурсы)."""
@@ -76,3 +92,32 @@ class UserRole(models.Model):
 
     def __str__(self):
         return f"{self.user.email} has role {self.role.name}"
+
+
+class RoleClosure(models.Model):
+    """Транзитивное замыкание иерархии ролей: все пары (предок, потомок) с расстоянием."""
+    ancestor = models.ForeignKey(Role, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Role, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        db_table = 'role_closure'
+        unique_together = [['ancestor', 'descendant']]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+
+class UserEffectivePermission(models.Model):
+    """Денормализованные права пользователя на элемент: OR масок правил всех его ролей."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='effective_permissions')
+    element_code = models.CharField(max_length=50)
+    # Биты RBACIndex: READ, READ_ALL, CREATE, UPDATE, UPDATE_ALL, DELETE, DELETE_ALL
+    mask = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        db_table = 'user_effective_permissions'
+        unique_together = [['user', 'element_code']]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.element_code}: {self.mask}"
@@ -1,23 +1,46 @@
 """Serializers для RBAC моделей."""
 from rest_framework import serializers
 from apps.permissions.models import Role, BusinessElement, AccessRule
+from apps.permissions.services.role_hierarchy_service import RoleHierarchyService
+from core.exceptions import ValidationError
 
 
-class RoleSerializer(serializers.ModelSerializer):
+class FieldSelectionMixin:
+    """Принимает fields=[...] и оставляет в выдаче только эти поля."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            unknown = set(fields) - set(self.fields)
+            if unknown:
+                raise ValidationError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class RoleSerializer(FieldSelectionMixin, serializers.ModelSerializer):
     class Meta:
         model = Role
-        fields = ['id', 'name', 'description', 'is_system', 'created_at', 'updated_at']
+        fields = ['id', 'name', 'description', 'is_system', 'parent', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+    def validate_parent(self, parent):
+        role_id = self.instance.pk if self.instance is not None else None
+        if parent is not None and RoleHierarchyService.creates_cycle(role_id, parent.pk):
+            raise serializers.ValidationError("Role cannot inherit from itself or its descendant")
+        return parent
+
 
-class BusinessElementSerializer(serializers.ModelSerializer):
+class BusinessElementSerializer(FieldSelectionMixin, serializers.ModelSerializer):
     class Meta:
         model = BusinessElement
         fields = ['id', 'code', 'name', 'description', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class AccessRuleSerializer(serializers.ModelSerializer):
+class AccessRuleSerializer(FieldSelectionMixin, serializers.ModelSerializer):
     role_name = serializers.CharField(source='role.name', read_only=True)
     element_code = serializers.CharField(source='element.code', read_only=True)
 
@@ -30,4 +53,20 @@ class AccessRuleSerializer(serializers.ModelSerializer):
             'can_delete', 'can_delete_all',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
\ No newline at end of file
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+
+class PermissionCheckSerializer(serializers.Serializer):
+    resource = serializers.CharField(max_length=50)
+    action = serializers.ChoiceField(choices=['read', 'create', 'update', 'delete'])
+    owner_id = serializers.IntegerField(required=False, allow_null=True)
+
+
+class BatchPermissionCheckSerializer(serializers.Serializer):
+    checks = serializers.ListField(child=PermissionCheckSerializer(), min_length=1, max_length=200)
+
+
+class BulkUserRoleSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=['assign', 'revoke'])
+    user_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), min_length=1, max_length=100000)
+    role_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), min_length=1, max_length=100)
@@ -0,0 +1,185 @@
+"""Материализованные эффективные права пользователей (таблица user_effective_permissions)."""
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from asgiref.local import Local
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.db.models import Q
+from apps.users.models import User
+from apps.permissions.models import AccessRule, UserEffectivePermission, UserRole
+from apps.permissions.services.rbac_index import RULE_FLAGS, RBACIndex, rule_mask
+
+
+class _PendingRefresh:
+    """Изменения прав, накопленные до коммита транзакции."""
+    __slots__ = ('user_ids', 'role_ids', 'element_ids')
+
+    def __init__(self):
+        self.user_ids: Set[int] = set()
+        self.role_ids: Set[int] = set()
+        self.element_ids: Set[int] = set()
+
+
+# Пачка текущей транзакции; Local - как у соединений Django (поток или async контекст)
+_local = Local()
+
+
+class EffectivePermissionService:
+    """Поддержка user_effective_permissions: маска по (user, element_code) - OR правил всех ролей."""
+    BATCH_SIZE = 1000
+
+    @staticmethod
+    def refresh_users(user_ids: Iterable[int], element_codes: Optional[Iterable[str]] = None) -> int:
+        """Пересчитывает строки пользователей (только по element_codes, если переданы)."""
+        user_ids = sorted(set(user_ids))
+        if element_codes is not None:
+            element_codes = list(element_codes)
+
+        created = 0
+        with transaction.atomic():
+            for start in range(0, len(user_ids), EffectivePermissionService.BATCH_SIZE):
+                chunk = user_ids[start:start + EffectivePermissionService.BATCH_SIZE]
+                created += EffectivePermissionService._refresh_chunk(chunk, element_codes)
+        return created
+
+    @staticmethod
+    def schedule(user_ids: Iterable[int] = (), role_ids: Iterable[int] = (), element_ids: Iterable[int] = ()) -> None:
+        """Пересчет после коммита: пользователи, пользователи ролей (с потомками) и элементов; версия политики.
+
+        Изменения одной транзакции обрабатываются одним пересчетом после коммита, вне транзакции - сразу.
+        """
+        if not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            EffectivePermissionService.apply(user_ids, role_ids, element_ids)
+            return
+
+        pending = getattr(_local, 'pending', None)
+        if pending is None:
+            pending = _local.pending = _PendingRefresh()
+
+        pending.user_ids.update(user_ids)
+        pending.role_ids.update(role_ids)
+        pending.element_ids.update(element_ids)
+
+        # Хук на каждый вызов: хуки откаченного savepoint отбрасываются, первый выполненный забирает всю пачку.
+        # Остаток откаченной транзакции уйдет со следующей - лишний пересчет по закоммиченным данным безопасен
+        transaction.on_commit(EffectivePermissionService._flush)
+
+    @staticmethod
+    def _flush() -> None:
+        pending = getattr(_local, 'pending', None)
+        if pending is None:
+            return
+
+        _local.pending = None
+        EffectivePermissionService.apply(pending.user_ids, pending.role_ids, pending.element_ids)
+
+    @staticmethod
+    def apply(user_ids: Iterable[int] = (), role_ids: Iterable[int] = (), element_ids: Iterable[int] = ()) -> int:
+        """Пересчитывает затронутых пользователей по закоммиченным данным и поднимает версию политики."""
+        user_ids = set(user_ids)
+        role_ids = set(role_ids)
+        element_ids = set(element_ids)
+
+        try:
+            # Без RBAC_MATERIALIZED_PERMISSIONS таблица не читается: перед включением ее заполняет rebuild
+            if not settings.RBAC_MATERIALIZED_PERMISSIONS:
+                return 0
+
+            with transaction.atomic():
+                if role_ids:
+                    # Пользователи самих ролей и ролей-потомков, наследующих их правила
+                    user_ids.update(UserRole.objects.filter(
+                        Q(role_id__in=role_ids) | Q(role__ancestor_links__ancestor_id__in=role_ids)
+                    ).values_list('user_id', flat=True))
+                if element_ids:
+                    user_ids.update(UserRole.objects.filter(
+                        Q(role__access_rules__element_id__in=element_ids) |
+                        Q(role__ancestor_links__ancestor__access_rules__element_id__in=element_ids)
+                    ).values_list('user_id', flat=True))
+
+                # Полный пересчет: строки под старыми кодами элементов тоже удаляются
+                return EffectivePermissionService.refresh_users(user_ids) if user_ids else 0
+        finally:
+            RBACIndex.bump_version()
+
+    @staticmethod
+    def rebuild() -> int:
+        """Полная пересборка таблицы одной транзакцией."""
+        created = 0
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Изменения ролей, правил и иерархии ждут конца пересборки, чтения не блокируются
+                with connection.cursor() as cursor:
+                    cursor.execute('LOCK TABLE user_roles, access_rules, role_closure IN SHARE MODE')
+
+            UserEffectivePermission.objects.all().delete()
+            role_masks = EffectivePermissionService._role_masks(AccessRule.objects.all())
+
+            pairs = EffectivePermissionService._effective_pairs(
+                UserRole.objects.all(),
+                chunk_size=EffectivePermissionService.BATCH_SIZE
+            )
+            batch = []
+            for row in EffectivePermissionService._rows(pairs, role_masks):
+                batch.append(row)
+                if len(batch) >= EffectivePermissionService.BATCH_SIZE:
+                    UserEffectivePermission.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+
+            UserEffectivePermission.objects.bulk_create(batch)
+            created += len(batch)
+
+        return created
+
+    @staticmethod
+    def _refresh_chunk(user_ids: List[int], element_codes: Optional[List[str]]) -> int:
+        # Пересчеты одних пользователей идут по очереди, и каждый читает роли и правила уже после
+        # захвата блокировки: пересчет, запущенный после коммита изменения, видит его и все более ранние
+        list(User.objects.select_for_update().filter(id__in=user_ids).order_by('id').values_list('id', flat=True))
+
+        pairs = list(EffectivePermissionService._effective_pairs(UserRole.objects.filter(user_id__in=user_ids)))
+        rules = AccessRule.objects.filter(role_id__in={role_id for _, role_id in pairs})
+        stale = UserEffectivePermission.objects.filter(user_id__in=user_ids)
+        if element_codes is not None:
+            rules = rules.filter(element__code__in=element_codes)
+            stale = stale.filter(element_code__in=element_codes)
+
+        rows = list(EffectivePermissionService._rows(pairs, EffectivePermissionService._role_masks(rules)))
+        stale.delete()
+        UserEffectivePermission.objects.bulk_create(rows)
+        return len(rows)
+
+    @staticmethod
+    def _effective_pairs(user_roles, chunk_size: Optional[int] = None):
+        """(user_id, role_id) по назначенным ролям и их предкам из role_closure одним запросом, по user_id."""
+        rows = user_roles.order_by('user_id').values_list('user_id', 'role_id', 'role__ancestor_links__ancestor_id')
+        if chunk_size is not None:
+            rows = rows.iterator(chunk_size=chunk_size)
+
+        for user_id, role_id, ancestor_id in rows:
+            yield user_id, role_id
+            if ancestor_id is not None:
+                yield user_id, ancestor_id
+
+    @staticmethod
+    def _role_masks(rules) -> Dict[int, Dict[str, int]]:
+        fields = [name for name, _ in RULE_FLAGS]
+        role_masks: Dict[int, Dict[str, int]] = {}
+        for role_id, element_code, *flags in rules.order_by().values_list('role_id', 'element__code', *fields):
+            role_masks.setdefault(role_id, {})[element_code] = rule_mask(*flags)
+        return role_masks
+
+    @staticmethod
+    def _rows(pairs: Iterable[Tuple[int, int]], role_masks: Dict[int, Dict[str, int]]):
+        """Строки таблицы из пар (user_id, role_id), упорядоченных по user_id."""
+        for user_id, user_pairs in groupby(pairs, key=itemgetter(0)):
+            masks: Dict[str, int] = {}
+            for _, role_id in user_pairs:
+                for element_code, mask in role_masks.get(role_id, {}).items():
+                    masks[element_code] = masks.get(element_code, 0) | mask
+
+            for element_code, mask in masks.items():
+                if mask:
+                    yield UserEffectivePermission(user_id=user_id, element_code=element_code, mask=mask)
@@ -1,67 +1,177 @@
 """Сервис проверки прав доступа RBAC."""
-from typing import Optional
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+from django.conf import settings
 from apps.users.models import User
-from apps.permissions.models import AccessRule, BusinessElement
+from apps.permissions.services.rbac_index import RBACIndex
+from core import metrics
+from core.timing import timed
 
 
 class PermissionService:
     """Проверка прав пользователя на основе RBAC."""
 
     @staticmethod
+    @timed('rbac')
     def check_permission(
         user: User,
         resource_code: str,
         action: str,
-        resource_owner_id: Optional[int] = None
+        resource_owner_id: Optional[int] = None,
+        claims: Optional[Dict] = None
     ) -> bool:
         """Проверяет право пользователя на действие с ресурсом."""
+        snapshot = RBACIndex.snapshot()
         if not user or not user.is_authenticated or not user.is_active:
-            return False
-
-        try:
-            element = BusinessElement.objects.get(code=resource_code)
-        except BusinessElement.DoesNotExist:
-            return False
-
-        user_roles = user.user_roles.select_related('role').all()
-
-        if not user_roles.exists():
-            return False
-
-        for user_role in user_roles:
-            role = user_role.role
-
-            try:
-                rule = AccessRule.objects.get(role=role, element=element)
-            except AccessRule.DoesNotExist:
-                continue
-
-            if action == 'read':
-                if rule.can_read_all:
-                    return True
-                if rule.can_read:
-                    if resource_owner_id is None or resource_owner_id == user.id:
-                        return True
-
-            elif action == 'create':
-                if rule.can_create:
-                    return True
-
-            elif action == 'update':
-                if rule.can_update_all:
-                    return True
-                if rule.can_update:
-                    if resource_owner_id is None or resource_owner_id == user.id:
-                        return True
-
-            elif action == 'delete':
-                if rule.can_delete_all:
-                    return True
-                if rule.can_delete:
-                    if resource_owner_id is None or resource_owner_id == user.id:
-                        return True
-
-        return False
+            return PermissionService._record(resource_code, False, snapshot)
+
+        mask = PermissionService.get_user_mask(user, resource_code, claims, snapshot)
+
+        return PermissionService._record(
+            resource_code,
+            RBACIndex.allows(mask, action, user.id, resource_owner_id),
+            snapshot
+        )
+
+    @staticmethod
+    @timed('rbac')
+    async def acheck_permission(
+        user: User,
+        resource_code: str,
+        action: str,
+        resource_owner_id: Optional[int] = None,
+        claims: Optional[Dict] = None
+    ) -> bool:
+        """Async вариант check_permission() для ASGI."""
+        snapshot = await RBACIndex.asnapshot()
+        if not user or not user.is_authenticated or not user.is_active:
+            return PermissionService._record(resource_code, False, snapshot)
+
+        mask = await PermissionService.aget_user_mask(user, resource_code, claims, snapshot)
+
+        return PermissionService._record(
+            resource_code,
+            RBACIndex.allows(mask, action, user.id, resource_owner_id),
+            snapshot
+        )
+
+    @staticmethod
+    @timed('rbac')
+    def check_permissions(
+        user: User,
+        checks: Iterable[Tuple[str, str, Optional[int]]],
+        claims: Optional[Dict] = None
+    ) -> List[bool]:
+        """Проверяет набор (resource_code, action, resource_owner_id) за одну загрузку ролей."""
+        checks = list(checks)
+        snapshot = RBACIndex.snapshot()
+        if not user or not user.is_authenticated or not user.is_active:
+            return [PermissionService._record(resource_code, False, snapshot) for resource_code, _, _ in checks]
+
+        role_ids = PermissionService.get_user_role_ids(user, claims, snapshot)
+
+        masks = {}
+        results = []
+        for resource_code, action, resource_owner_id in checks:
+            mask = masks.get(resource_code)
+            if mask is None:
+                mask = masks[resource_code] = RBACIndex.get_mask(role_ids, resource_code, snapshot)
+            results.append(PermissionService._record(
+                resource_code,
+                RBACIndex.allows(mask, action, user.id, resource_owner_id),
+                snapshot
+            ))
+
+        return results
+
+    @staticmethod
+    def _record(resource_code: str, allowed: bool, snapshot) -> bool:
+        # Код ресурса приходит из запроса: метка только для существующих элементов
+        element = RBACIndex.element_label(resource_code, snapshot)
+        metrics.inc('rbac_permission_checks_total', element=element, result='allow' if allowed else 'deny')
+        return allowed
+
+    @staticmethod
+    def get_user_mask(user: User, resource_code: str, claims: Optional[Dict], snapshot) -> int:
+        """Маска прав на ресурс: по известным ролям, иначе из user_effective_permissions (если включено)."""
+        role_ids = PermissionService.get_known_role_ids(user, claims, snapshot)
+        if role_ids is None:
+            if settings.RBAC_MATERIALIZED_PERMISSIONS:
+                return RBACIndex.get_user_mask(user.id, resource_code, snapshot)
+            role_ids = RBACIndex.get_role_ids(user.id, snapshot)
+        return RBACIndex.get_mask(role_ids, resource_code, snapshot)
+
+    @staticmethod
+    async def aget_user_mask(user: User, resource_code: str, claims: Optional[Dict], snapshot) -> int:
+        """Async вариант get_user_mask()."""
+        role_ids = PermissionService.get_known_role_ids(user, claims, snapshot)
+        if role_ids is None:
+            if settings.RBAC_MATERIALIZED_PERMISSIONS:
+                return await RBACIndex.aget_user_mask(user.id, resource_code, snapshot)
+            role_ids = await RBACIndex.aget_role_ids(user.id, snapshot)
+        return RBACIndex.get_mask(role_ids, resource_code, snapshot)
+
+    @staticmethod
+    def get_known_role_ids(user: User, claims: Optional[Dict], snapshot) -> Optional[Tuple[int, ...]]:
+        """Роли из Principal или claims актуальной версии без обращения к БД (None - неизвестны)."""
+        if getattr(user, 'policy_version', None) == snapshot.version:
+            return user.role_ids
+        return PermissionService.get_claimed_role_ids(user.id, claims, snapshot.version)
+
+    @staticmethod
+    def get_user_role_ids(user: User, claims: Optional[Dict], snapshot) -> Tuple[int, ...]:
+        """Роли пользователя: из Principal или claims актуальной версии, иначе из индекса."""
+        role_ids = PermissionService.get_known_role_ids(user, claims, snapshot)
+        if role_ids is None:
+            role_ids = RBACIndex.get_role_ids(user.id, snapshot)
+        return role_ids
+
+    @staticmethod
+    async def aget_user_role_ids(user: User, claims: Optional[Dict], snapshot) -> Tuple[int, ...]:
+        """Async вариант get_user_role_ids()."""
+        role_ids = PermissionService.get_known_role_ids(user, claims, snapshot)
+        if role_ids is None:
+            role_ids = await RBACIndex.aget_role_ids(user.id, snapshot)
+        return role_ids
+
+    @staticmethod
+    def get_permissions_etag(role_ids: Tuple[int, ...], version: str) -> str:
+        """ETag эффективных прав: меняется вместе с набором ролей или версией политики."""
+        source = f"{version}:{','.join(str(role_id) for role_id in sorted(set(role_ids)))}"
+        return '"' + hashlib.sha256(source.encode('utf-8')).hexdigest()[:32] + '"'
+
+    @staticmethod
+    def get_token_claims(user: User) -> Dict:
+        """RBAC claims для access токена: роли, активность и версия политики."""
+        snapshot = RBACIndex.snapshot()
+        return {
+            'roles': list(RBACIndex.get_role_ids(user.id, snapshot)),
+            'active': user.is_active,
+            'pv': snapshot.version,
+        }
+
+    @staticmethod
+    async def aget_token_claims(user: User) -> Dict:
+        """Async вариант get_token_claims()."""
+        snapshot = await RBACIndex.asnapshot()
+        return {
+            'roles': list(await RBACIndex.aget_role_ids(user.id, snapshot)),
+            'active': user.is_active,
+            'pv': snapshot.version,
+        }
+
+    @staticmethod
+    def get_claimed_role_ids(user_id: int, claims: Optional[Dict], version: str) -> Optional[Tuple[int, ...]]:
+        """Роли из claims токена, если они выпущены для текущей версии политики."""
+        if not claims or claims.get('pv') != version:
+            return None
+        if claims.get('user_id') != user_id or claims.get('active') is not True:
+            return None
+
+        roles = claims.get('roles')
+        if not isinstance(roles, list):
+            return None
+        return tuple(roles)
 
     @staticmethod
     def can_read(user: User, resource_code: str, resource_owner_id: Optional[int] = None) -> bool:
@@ -0,0 +1,287 @@
+"""Скомпилированный in-memory индекс RBAC правил."""
+import threading
+import uuid
+from typing import Dict, Iterable, Optional, Tuple
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from apps.permissions.models import AccessRule, BusinessElement, RoleClosure, UserEffectivePermission, UserRole
+
+
+READ = 1 << 0
+READ_ALL = 1 << 1
+CREATE = 1 << 2
+UPDATE = 1 << 3
+UPDATE_ALL = 1 << 4
+DELETE = 1 << 5
+DELETE_ALL = 1 << 6
+
+RULE_FLAGS = (
+    ('can_read', READ),
+    ('can_read_all', READ_ALL),
+    ('can_create', CREATE),
+    ('can_update', UPDATE),
+    ('can_update_all', UPDATE_ALL),
+    ('can_delete', DELETE),
+    ('can_delete_all', DELETE_ALL),
+)
+
+# action -> (бит "свои объекты", бит "все объекты")
+ACTION_FLAGS = {
+    'read': (READ, READ_ALL),
+    'create': (0, CREATE),
+    'update': (UPDATE, UPDATE_ALL),
+    'delete': (DELETE, DELETE_ALL),
+}
+
+
+def rule_mask(*flags: bool) -> int:
+    """Собирает битовую маску из флагов правила в порядке RULE_FLAGS."""
+    mask = 0
+    for (_, bit), enabled in zip(RULE_FLAGS, flags):
+        if enabled:
+            mask |= bit
+    return mask
+
+
+class _Snapshot:
+    """Неизменяемый срез правил для одной версии политики."""
+    __slots__ = ('version', 'masks', 'element_codes', 'role_masks', 'user_roles', 'user_masks', 'effective')
+
+    def __init__(self, version: str, masks: Dict[Tuple[int, str], int], element_codes: Iterable[str] = ()):
+        self.version = version
+        self.masks = masks
+        self.element_codes = frozenset(element_codes)
+        self.role_masks: Dict[int, Dict[str, int]] = {}
+        for (role_id, element_code), mask in masks.items():
+            self.role_masks.setdefault(role_id, {})[element_code] = mask
+        self.user_roles: Dict[int, Tuple[int, ...]] = {}
+        # Маски из user_effective_permissions по (user_id, element_code)
+        self.user_masks: Dict[Tuple[int, str], int] = {}
+        # Кеш эффективных прав по набору ролей
+        self.effective: Dict[Tuple[int, ...], Dict[str, Dict[str, str]]] = {}
+
+
+class RBACIndex:
+    """Индекс (role_id, element_code) -> маска прав с обновлением по версии политики."""
+    VERSION_CACHE_KEY = 'rbac:policy_version'
+
+    _snapshot: Optional[_Snapshot] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def current_version() -> str:
+        """Текущая версия RBAC политики."""
+        version = cache.get(RBACIndex.VERSION_CACHE_KEY)
+        if version is None:
+            cache.add(RBACIndex.VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+            version = cache.get(RBACIndex.VERSION_CACHE_KEY)
+        return version
+
+    @staticmethod
+    async def acurrent_version() -> str:
+        """Async вариант current_version() на async API кеша."""
+        version = await cache.aget(RBACIndex.VERSION_CACHE_KEY)
+        if version is None:
+            await cache.aadd(RBACIndex.VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+            version = await cache.aget(RBACIndex.VERSION_CACHE_KEY)
+        return version
+
+    @staticmethod
+    def bump_version() -> str:
+        """Инвалидирует скомпилированные правила в процессах, которые делят этот кеш (см. core.checks)."""
+        version = uuid.uuid4().hex
+        cache.set(RBACIndex.VERSION_CACHE_KEY, version, None)
+        return version
+
+    @classmethod
+    def snapshot(cls) -> _Snapshot:
+        """Возвращает актуальный срез, перестраивая его при смене версии."""
+        version = cls.current_version()
+        snapshot = cls._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        with cls._lock:
+            snapshot = cls._snapshot
+            if snapshot is None or snapshot.version != version:
+                snapshot = cls._build(version)
+                cls._snapshot = snapshot
+        return snapshot
+
+    @classmethod
+    async def asnapshot(cls) -> _Snapshot:
+        """Async вариант snapshot() на async ORM."""
+        version = await cls.acurrent_version()
+        snapshot = cls._snapshot
+        if snapshot is None or snapshot.version != version:
+            rows = [row async for row in cls._rules_query()]
+            links = [link async for link in cls._links_query()]
+            element_codes = [code async for code in cls._elements_query()]
+            snapshot = cls._compile(version, rows, links, element_codes)
+            cls._snapshot = snapshot
+        return snapshot
+
+    @classmethod
+    def _build(cls, version: str) -> _Snapshot:
+        return cls._compile(version, cls._rules_query(), cls._links_query(), cls._elements_query())
+
+    @staticmethod
+    def _rules_query():
+        fields = [name for name, _ in RULE_FLAGS]
+        # Срез живет до следующей смены версии: отстающая реплика закрепила бы в нем старые правила
+        return AccessRule.objects.using(DEFAULT_DB_ALIAS).order_by().values_list('role_id', 'element__code', *fields)
+
+    @staticmethod
+    def _links_query():
+        return RoleClosure.objects.using(DEFAULT_DB_ALIAS).order_by().values_list('descendant_id', 'ancestor_id')
+
+    @staticmethod
+    def _elements_query():
+        return BusinessElement.objects.using(DEFAULT_DB_ALIAS).order_by().values_list('code', flat=True)
+
+    @staticmethod
+    def _compile(version: str, rows, links=(), element_codes=()) -> _Snapshot:
+        direct: Dict[int, Dict[str, int]] = {}
+        masks = {}
+        for role_id, element_code, *flags in rows:
+            mask = rule_mask(*flags)
+            masks[(role_id, element_code)] = mask
+            direct.setdefault(role_id, {})[element_code] = mask
+
+        # Роль получает правила всех предков: проверки остаются одним поиском по (role_id, element_code)
+        for descendant_id, ancestor_id in links:
+            for element_code, mask in direct.get(ancestor_id, {}).items():
+                key = (descendant_id, element_code)
+                masks[key] = masks.get(key, 0) | mask
+
+        return _Snapshot(version, masks, element_codes)
+
+    @staticmethod
+    def element_label(resource_code: str, snapshot: _Snapshot) -> str:
+        """Код элемента для метрик: неизвестные коды из запросов сводятся к 'unknown'."""
+        return resource_code if resource_code in snapshot.element_codes else 'unknown'
+
+    @classmethod
+    def get_role_ids(cls, user_id: int, snapshot: Optional[_Snapshot] = None) -> Tuple[int, ...]:
+        """Роли пользователя: из кеша среза или одним запросом."""
+        snapshot = snapshot or cls.snapshot()
+        role_ids = snapshot.user_roles.get(user_id)
+        if role_ids is None:
+            role_ids = tuple(cls._roles_query(user_id))
+            cls._remember_roles(snapshot, user_id, role_ids)
+        return role_ids
+
+    @classmethod
+    async def aget_role_ids(cls, user_id: int, snapshot: _Snapshot) -> Tuple[int, ...]:
+        """Async вариант get_role_ids()."""
+        role_ids = snapshot.user_roles.get(user_id)
+        if role_ids is None:
+            role_ids = tuple([role_id async for role_id in cls._roles_query(user_id)])
+            cls._remember_roles(snapshot, user_id, role_ids)
+        return role_ids
+
+    @staticmethod
+    def _roles_query(user_id: int):
+        # Роли запоминаются в срезе до смены версии: отстающая реплика закрепила бы в нем старые роли
+        return UserRole.objects.using(DEFAULT_DB_ALIAS).filter(user_id=user_id).order_by('role_id').values_list(
+            'role_id', flat=True
+        )
+
+    @staticmethod
+    def _remember_roles(snapshot: _Snapshot, user_id: int, role_ids: Tuple[int, ...]) -> None:
+        if len(snapshot.user_roles) >= settings.RBAC_USER_ROLES_CACHE_SIZE:
+            snapshot.user_roles.clear()
+        snapshot.user_roles[user_id] = role_ids
+
+    @classmethod
+    def get_user_mask(cls, user_id: int, resource_code: str, snapshot: Optional[_Snapshot] = None) -> int:
+        """Маска пользователя на ресурс из материализованной таблицы: один поиск по уникальному индексу."""
+        snapshot = snapshot or cls.snapshot()
+        key = (user_id, resource_code)
+        mask = snapshot.user_masks.get(key)
+        if mask is None:
+            mask = cls._user_mask_query(user_id, resource_code).first() or 0
+            cls._remember_mask(snapshot, key, mask)
+        return mask
+
+    @classmethod
+    async def aget_user_mask(cls, user_id: int, resource_code: str, snapshot: _Snapshot) -> int:
+        """Async вариант get_user_mask()."""
+        key = (user_id, resource_code)
+        mask = snapshot.user_masks.get(key)
+        if mask is None:
+            mask = await cls._user_mask_query(user_id, resource_code).afirst() or 0
+            cls._remember_mask(snapshot, key, mask)
+        return mask
+
+    @staticmethod
+    def _user_mask_query(user_id: int, resource_code: str):
+        return UserEffectivePermission.objects.using(DEFAULT_DB_ALIAS).filter(
+            user_id=user_id,
+            element_code=resource_code
+        ).values_list('mask', flat=True)
+
+    @staticmethod
+    def _remember_mask(snapshot: _Snapshot, key: Tuple[int, str], mask: int) -> None:
+        if len(snapshot.user_masks) >= settings.RBAC_USER_ROLES_CACHE_SIZE:
+            snapshot.user_masks.clear()
+        snapshot.user_masks[key] = mask
+
+    @classmethod
+    def get_mask(cls, role_ids: Iterable[int], resource_code: str, snapshot: Optional[_Snapshot] = None) -> int:
+        """Объединенная маска прав набора ролей на ресурс."""
+        snapshot = snapshot or cls.snapshot()
+        masks = snapshot.masks
+        mask = 0
+        for role_id in role_ids:
+            mask |= masks.get((role_id, resource_code), 0)
+        return mask
+
+    @classmethod
+    def get_effective_permissions(
+        cls,
+        role_ids: Tuple[int, ...],
+        snapshot: Optional[_Snapshot] = None
+    ) -> Dict[str, Dict[str, str]]:
+        """Разрешенные действия набора ролей по элементам: {code: {action: 'own'|'all'}}."""
+        snapshot = snapshot or cls.snapshot()
+        key = tuple(sorted(set(role_ids)))
+        permissions = snapshot.effective.get(key)
+        if permissions is not None:
+            return permissions
+
+        masks: Dict[str, int] = {}
+        for role_id in key:
+            for element_code, mask in snapshot.role_masks.get(role_id, {}).items():
+                masks[element_code] = masks.get(element_code, 0) | mask
+
+        permissions = {}
+        for element_code, mask in sorted(masks.items()):
+            actions = {}
+            for action, (own_flag, all_flag) in ACTION_FLAGS.items():
+                if mask & all_flag:
+                    actions[action] = 'all'
+                elif mask & own_flag:
+                    actions[action] = 'own'
+            if actions:
+                permissions[element_code] = actions
+
+        if len(snapshot.effective) >= settings.RBAC_USER_ROLES_CACHE_SIZE:
+            snapshot.effective.clear()
+        snapshot.effective[key] = permissions
+        return permissions
+
+    @staticmethod
+    def allows(mask: int, action: str, user_id: int, resource_owner_id: Optional[int] = None) -> bool:
+        """Решение по маске прав для действия."""
+        flags = ACTION_FLAGS.get(action)
+        if flags is None:
+            return False
+
+        own_flag, all_flag = flags
+        if mask & all_flag:
+            return True
+        if mask & own_flag:
+            return resource_owner_id is None or resource_owner_id == user_id
+        return False
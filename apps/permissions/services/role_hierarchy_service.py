@@ -0,0 +1,102 @@
+"""Иерархия ролей и ее транзитивное замыкание (таблица role_closure)."""
+from typing import List, Optional
+from django.db import transaction
+from apps.permissions.models import Role, RoleClosure
+from apps.permissions.services.effective_permission_service import EffectivePermissionService
+from core.exceptions import ValidationError
+
+
+class RoleHierarchyService:
+    """Поддержка role_closure: в ней только строгие предки, правила самой роли читаются по role_id."""
+
+    @staticmethod
+    def get_ancestor_ids(role_id: int) -> List[int]:
+        """Все предки роли одним запросом по индексу, от ближайшего."""
+        return list(
+            RoleClosure.objects.filter(descendant_id=role_id).order_by('depth').values_list('ancestor_id', flat=True)
+        )
+
+    @staticmethod
+    def get_descendant_ids(role_id: int) -> List[int]:
+        """Все потомки роли одним запросом по индексу."""
+        return list(RoleClosure.objects.filter(ancestor_id=role_id).values_list('descendant_id', flat=True))
+
+    @staticmethod
+    def creates_cycle(role_id: Optional[int], parent_id: Optional[int]) -> bool:
+        """Станет ли роль своим же предком при назначении parent_id."""
+        if role_id is None or parent_id is None:
+            return False
+        return parent_id == role_id or RoleClosure.objects.filter(ancestor_id=role_id, descendant_id=parent_id).exists()
+
+    @staticmethod
+    def prepare_move(role: Role) -> bool:
+        """Проверяет смену parent перед сохранением; True - замыкание нужно перестроить."""
+        if role.pk is None:
+            if role.parent_id is None:
+                return False
+        else:
+            current = RoleClosure.objects.filter(descendant_id=role.pk, depth=1).values_list('ancestor_id', flat=True)
+            if role.parent_id == current.first():
+                return False
+
+        # Правки иерархии сериализуются: параллельные переносы не соберут цикл из двух проверенных по отдельности
+        list(Role.objects.select_for_update().order_by('id').values_list('id', flat=True))
+
+        if RoleHierarchyService.creates_cycle(role.pk, role.parent_id):
+            raise ValidationError(f"Role {role.name} cannot inherit from its own descendant")
+        return True
+
+    @staticmethod
+    def move(role: Role) -> None:
+        """Переносит поддерево роли под role.parent_id; права его пользователей пересчитываются после коммита."""
+        RoleHierarchyService._relink(role.pk, role.parent_id)
+        EffectivePermissionService.schedule(role_ids=[role.pk])
+
+    @staticmethod
+    def detach_children(role: Role) -> None:
+        """Отвязывает поддеревья детей удаляемой роли (parent обнуляет SET_NULL без сигналов)."""
+        child_ids = list(role.children.values_list('id', flat=True))
+        for child_id in child_ids:
+            RoleHierarchyService._relink(child_id, None)
+        EffectivePermissionService.schedule(role_ids=child_ids)
+
+    @staticmethod
+    def rebuild() -> int:
+        """Полная пересборка role_closure по parent ролей; права всех пользователей пересчитываются после коммита."""
+        with transaction.atomic():
+            parents = dict(Role.objects.select_for_update().order_by('id').values_list('id', 'parent_id'))
+
+            rows = []
+            for role_id in parents:
+                ancestor_id, depth = parents[role_id], 1
+                while ancestor_id is not None:
+                    if depth > len(parents):
+                        raise ValidationError(f"Role {role_id} is part of a parent cycle")
+                    rows.append(RoleClosure(ancestor_id=ancestor_id, descendant_id=role_id, depth=depth))
+                    ancestor_id, depth = parents[ancestor_id], depth + 1
+
+            RoleClosure.objects.all().delete()
+            RoleClosure.objects.bulk_create(rows)
+            EffectivePermissionService.schedule(role_ids=parents)
+
+        return len(rows)
+
+    @staticmethod
+    def _relink(role_id: int, parent_id: Optional[int]) -> None:
+        subtree = [(role_id, 0)] + list(
+            RoleClosure.objects.filter(ancestor_id=role_id).values_list('descendant_id', 'depth')
+        )
+        subtree_ids = [descendant_id for descendant_id, _ in subtree]
+
+        # Связи поддерева с прежними предками
+        RoleClosure.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+
+        if parent_id is not None:
+            ancestors = [(parent_id, 0)] + list(
+                RoleClosure.objects.filter(descendant_id=parent_id).values_list('ancestor_id', 'depth')
+            )
+            RoleClosure.objects.bulk_create([
+                RoleClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=up + down + 1)
+                for ancestor_id, up in ancestors
+                for descendant_id, down in subtree
+            ])
@@ -1,13 +1,17 @@
 """Сервис управления ролями."""
-from typing import List
-from django.db import transaction
+from typing import Dict, Iterable, List, Optional
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
 from apps.users.models import User
 from apps.permissions.models import Role, UserRole
+from apps.permissions.services.effective_permission_service import EffectivePermissionService
+from core import db_router
 from core.exceptions import ValidationError
 
 
 class RoleService:
     """Управление ролями пользователей."""
+    BATCH_SIZE = 1000
 
     @staticmethod
     @transaction.atomic
@@ -40,6 +44,95 @@ class RoleService:
         except UserRole.DoesNotExist:
             return False
 
+    @staticmethod
+    @transaction.atomic
+    def assign_roles_bulk(
+        user_ids: Iterable[int],
+        role_ids: Iterable[int],
+        assigned_by: Optional[User] = None
+    ) -> Dict:
+        """Назначает роли набору пользователей фиксированным числом запросов."""
+        role_ids = RoleService._existing_role_ids(role_ids)
+        user_ids = set(user_ids)
+        existing_user_ids = set()
+        assigned = 0
+
+        # Пакеты по пользователям: в памяти не больше BATCH_SIZE * len(role_ids) строк
+        ordered_user_ids = sorted(user_ids)
+        for start in range(0, len(ordered_user_ids), RoleService.BATCH_SIZE):
+            chunk = User.objects.filter(id__in=ordered_user_ids[start:start + RoleService.BATCH_SIZE])
+            chunk_user_ids = list(chunk.values_list('id', flat=True))
+            existing_user_ids.update(chunk_user_ids)
+
+            pairs = UserRole.objects.filter(user_id__in=chunk_user_ids, role_id__in=role_ids)
+            before = pairs.count()
+
+            # bulk_create не шлет post_save: пересчет и версия политики планируются один раз ниже
+            UserRole.objects.bulk_create(
+                [
+                    UserRole(user_id=user_id, role_id=role_id, assigned_by=assigned_by)
+                    for user_id in chunk_user_ids
+                    for role_id in role_ids
+                ],
+                ignore_conflicts=True
+            )
+            assigned += pairs.count() - before
+
+        if assigned:
+            EffectivePermissionService.schedule(user_ids=existing_user_ids)
+            db_router.pin_users(existing_user_ids)
+
+        return {
+            'assigned': assigned,
+            'missing_user_ids': sorted(user_ids - existing_user_ids),
+        }
+
+    @staticmethod
+    @transaction.atomic
+    def revoke_roles_bulk(user_ids: Iterable[int], role_ids: Iterable[int]) -> Dict:
+        """Отзывает роли у набора пользователей; последняя роль не отзывается (проверка в SQL)."""
+        role_ids = RoleService._existing_role_ids(role_ids)
+        user_ids = set(user_ids)
+
+        has_other_role = Exists(
+            UserRole.objects.filter(user_id=OuterRef('user_id')).exclude(role_id__in=role_ids)
+        )
+        targeted = UserRole.objects.filter(user_id__in=user_ids, role_id__in=role_ids).order_by()
+
+        skipped_user_ids = sorted(set(
+            targeted.filter(~has_other_role).values_list('user_id', flat=True)
+        ))
+
+        rows = list(targeted.filter(has_other_role).values_list('id', 'user_id'))
+        revoked_user_ids = {user_id for _, user_id in rows}
+
+        # Удаление без post_delete: пересчет, закрепление чтений и версия политики - один раз ниже
+        table = connection.ops.quote_name(UserRole._meta.db_table)
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), RoleService.BATCH_SIZE):
+                ids = [row_id for row_id, _ in rows[start:start + RoleService.BATCH_SIZE]]
+                cursor.execute(f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+
+        if revoked_user_ids:
+            EffectivePermissionService.schedule(user_ids=revoked_user_ids)
+            db_router.pin_users(revoked_user_ids)
+
+        return {
+            'revoked': len(rows),
+            'skipped_user_ids': skipped_user_ids,
+        }
+
+    @staticmethod
+    def _existing_role_ids(role_ids: Iterable[int]) -> List[int]:
+        role_ids = set(role_ids)
+        existing = set(Role.objects.filter(id__in=role_ids).values_list('id', flat=True))
+
+        missing = role_ids - existing
+        if missing:
+            raise ValidationError(f"Roles not found: {', '.join(str(role_id) for role_id in sorted(missing))}")
+
+        return sorted(existing)
+
     @staticmethod
     def get_user_roles(user: User) -> List[Role]:
         """Возвращает роли пользователя."""
@@ -0,0 +1,62 @@
+"""Инвалидация скомпилированных RBAC правил, ETag версий, чтений с реплик и материализованных прав."""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from apps.permissions.models import Role, BusinessElement, AccessRule, UserRole, UserEffectivePermission
+from apps.permissions.services.effective_permission_service import EffectivePermissionService
+from apps.permissions.services.role_hierarchy_service import RoleHierarchyService
+from core import db_router, etags
+
+
+# Пересчет прав и смена версии политики - один раз после коммита транзакции, сколько бы строк она ни изменила
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def bump_policy_version(sender, **kwargs):
+    EffectivePermissionService.schedule()
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=BusinessElement)
+@receiver(post_delete, sender=BusinessElement)
+@receiver(post_save, sender=AccessRule)
+@receiver(post_delete, sender=AccessRule)
+def bump_etag_versions(sender, instance, **kwargs):
+    # До коммита и после него: ответ, прочитанный между записью и коммитом, не закрепится под новым ETag
+    pk = instance.pk
+    etags.bump(sender, pk)
+    transaction.on_commit(lambda: etags.bump(sender, pk))
+
+
+@receiver(post_save, sender=UserRole)
+@receiver(post_delete, sender=UserRole)
+def pin_user_to_primary(sender, instance, **kwargs):
+    db_router.pin_users([instance.user_id])
+
+
+@receiver(post_save, sender=UserRole)
+@receiver(post_delete, sender=UserRole)
+def refresh_user_permissions(sender, instance, **kwargs):
+    EffectivePermissionService.schedule(user_ids=[instance.user_id])
+
+
+@receiver(post_save, sender=AccessRule)
+@receiver(post_delete, sender=AccessRule)
+def refresh_rule_permissions(sender, instance, **kwargs):
+    EffectivePermissionService.schedule(role_ids=[instance.role_id])
+
+
+@receiver(post_save, sender=BusinessElement)
+def refresh_element_permissions(sender, instance, created, **kwargs):
+    EffectivePermissionService.schedule(element_ids=[] if created else [instance.pk])
+
+
+@receiver(post_delete, sender=BusinessElement)
+def delete_element_permissions(sender, instance, **kwargs):
+    UserEffectivePermission.objects.filter(element_code=instance.code).delete()
+    EffectivePermissionService.schedule()
+
+
+@receiver(pre_delete, sender=Role)
+def detach_child_roles(sender, instance, **kwargs):
+    RoleHierarchyService.detach_children(instance)
@@ -1 +1,286 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from unittest import mock
+from django.db import transaction
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from apps.authentication.services.auth_service import AuthService
+from apps.authentication.services.token_service import TokenService
+from apps.permissions.models import AccessRule, BusinessElement, Role, RoleClosure, UserEffectivePermission, UserRole
+from apps.permissions.serializers import RoleSerializer
+from apps.permissions.services.effective_permission_service import EffectivePermissionService
+from apps.permissions.services.permission_service import PermissionService
+from apps.permissions.services.rbac_index import RBACIndex
+from apps.permissions.services.role_hierarchy_service import RoleHierarchyService
+from apps.permissions.services.role_service import RoleService
+from apps.users.models import User
+from core.exceptions import ValidationError
+
+
+def closure_rows():
+    return set(RoleClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+
+
+def effective_rows():
+    return set(UserEffectivePermission.objects.values_list('user_id', 'element_code', 'mask'))
+
+
+def admin_client(test_case):
+    """Клиент пользователя с полными правами на access_rules."""
+    with test_case.captureOnCommitCallbacks(execute=True):
+        role = Role.objects.create(name='admin')
+        AccessRule.objects.create(
+            role=role,
+            element=BusinessElement.objects.create(code='access_rules', name='Access rules'),
+            can_read_all=True,
+            can_create=True,
+            can_update_all=True,
+            can_delete_all=True
+        )
+        user = User.objects.create(email='admin@test.com', password='-', first_name='Admin', last_name='User')
+        UserRole.objects.create(user=user, role=role)
+
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {TokenService.create_access_token(user.id)}')
+    return client
+
+
+@override_settings(RBAC_MATERIALIZED_PERMISSIONS=True)
+class RoleHierarchyTests(TestCase):
+    """Иерархия ролей: отклонение циклов и согласованность role_closure с parent."""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.element = BusinessElement.objects.create(code='reports', name='Reports')
+            self.root = Role.objects.create(name='root')
+            self.middle = Role.objects.create(name='middle', parent=self.root)
+            self.leaf = Role.objects.create(name='leaf', parent=self.middle)
+            AccessRule.objects.create(role=self.root, element=self.element, can_read_all=True)
+
+            self.user = User.objects.create(email='leaf@test.com', password='-', first_name='Leaf', last_name='User')
+            UserRole.objects.create(user=self.user, role=self.leaf)
+
+    def test_closure_holds_all_ancestors(self):
+        self.assertEqual(RoleHierarchyService.get_ancestor_ids(self.leaf.id), [self.middle.id, self.root.id])
+        self.assertIn((self.user.id, 'reports'), {(user_id, code) for user_id, code, _ in effective_rows()})
+
+    def test_self_parent_rejected(self):
+        self.middle.parent = self.middle
+        with self.assertRaises(ValidationError):
+            self.middle.save()
+
+    def test_descendant_parent_rejected(self):
+        before = closure_rows()
+        self.root.parent = self.leaf
+        with self.assertRaises(ValidationError):
+            self.root.save()
+
+        self.assertEqual(closure_rows(), before)
+        self.root.refresh_from_db()
+        self.assertIsNone(self.root.parent_id)
+
+    def test_serializer_rejects_descendant_parent(self):
+        serializer = RoleSerializer(self.root, data={'parent': self.leaf.id}, partial=True)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('parent', serializer.errors)
+
+    def test_rebuild_matches_incremental_maintenance(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            extra = Role.objects.create(name='extra', parent=self.leaf)
+            self.leaf.parent = None
+            self.leaf.save()
+            self.leaf.parent = self.root
+            self.leaf.save()
+            self.middle.delete()
+            self.root.parent = Role.objects.create(name='top')
+            self.root.save()
+            UserRole.objects.create(user=self.user, role=extra)
+
+        incremental_closure = closure_rows()
+        incremental_permissions = effective_rows()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            RoleHierarchyService.rebuild()
+        self.assertEqual(closure_rows(), incremental_closure)
+
+        EffectivePermissionService.rebuild()
+        self.assertEqual(effective_rows(), incremental_permissions)
+
+    def test_moving_subtree_out_revokes_inherited_permissions(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.leaf.parent = None
+            self.leaf.save()
+
+        self.assertEqual(RoleHierarchyService.get_ancestor_ids(self.leaf.id), [])
+        self.assertFalse(UserEffectivePermission.objects.filter(user=self.user, element_code='reports').exists())
+
+
+@override_settings(RBAC_MATERIALIZED_PERMISSIONS=True)
+class RoleBulkTests(TestCase):
+    """Массовое назначение и отзыв ролей."""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.element = BusinessElement.objects.create(code='orders', name='Orders')
+            self.base = Role.objects.create(name='base')
+            self.manager = Role.objects.create(name='manager')
+            AccessRule.objects.create(role=self.manager, element=self.element, can_read_all=True)
+
+            self.users = [
+                User.objects.create(email=f'bulk{i}@test.com', password='-', first_name='Bulk', last_name='User')
+                for i in range(5)
+            ]
+            for user in self.users[:4]:
+                UserRole.objects.create(user=user, role=self.base)
+            RoleService.assign_roles_bulk([user.id for user in self.users], [self.manager.id])
+
+    def test_revoke_keeps_last_role_and_refreshes_permissions(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            result = RoleService.revoke_roles_bulk([user.id for user in self.users], [self.manager.id])
+
+        self.assertEqual(result, {'revoked': 4, 'skipped_user_ids': [self.users[4].id]})
+        self.assertEqual(
+            {user_id for user_id, code, _ in effective_rows() if code == 'orders'},
+            {self.users[4].id}
+        )
+
+    def test_revoke_query_count_independent_of_user_count(self):
+        with self.assertNumQueries(6):
+            RoleService.revoke_roles_bulk([user.id for user in self.users], [self.manager.id])
+
+
+class EffectivePermissionTests(TestCase):
+    """Материализованные права: пересчет только при RBAC_MATERIALIZED_PERMISSIONS и чтение на HTTP пути."""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.element = BusinessElement.objects.create(code='invoices', name='Invoices')
+            self.role = Role.objects.create(name='accountant')
+            AccessRule.objects.create(role=self.role, element=self.element, can_read_all=True)
+            self.user = User.objects.create(email='eff@test.com', password='-', first_name='Eff', last_name='User')
+
+    def assign(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            UserRole.objects.create(user=self.user, role=self.role)
+
+    @override_settings(RBAC_MATERIALIZED_PERMISSIONS=False)
+    def test_no_refresh_when_disabled(self):
+        version = RBACIndex.current_version()
+        self.assign()
+
+        self.assertEqual(effective_rows(), set())
+        self.assertNotEqual(RBACIndex.current_version(), version)
+
+    @override_settings(RBAC_MATERIALIZED_PERMISSIONS=True)
+    def test_one_refresh_per_transaction(self):
+        with mock.patch.object(EffectivePermissionService, 'apply') as apply:
+            with self.captureOnCommitCallbacks(execute=True):
+                UserRole.objects.create(user=self.user, role=self.role)
+                AccessRule.objects.filter(role=self.role).update(can_create=True)
+                EffectivePermissionService.schedule(role_ids=[self.role.id])
+
+        apply.assert_called_once_with({self.user.id}, {self.role.id}, set())
+
+    @override_settings(RBAC_MATERIALIZED_PERMISSIONS=True)
+    def test_rolled_back_savepoint_does_not_drop_refresh(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    EffectivePermissionService.schedule(role_ids=[self.role.id])
+                    raise ValueError
+            except ValueError:
+                pass
+            UserRole.objects.create(user=self.user, role=self.role)
+
+        self.assertEqual({(user_id, code) for user_id, code, _ in effective_rows()}, {(self.user.id, 'invoices')})
+
+    @override_settings(RBAC_MATERIALIZED_PERMISSIONS=True)
+    def test_cold_principal_checks_materialized_mask(self):
+        self.assign()
+        principal = AuthService.resolve_principal({'user_id': self.user.id})
+        self.assertIsNone(principal.role_ids)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(PermissionService.check_permission(principal, 'invoices', 'read'))
+
+
+class AdminListPaginationTests(TestCase):
+    """Cursor пагинация списков админки."""
+
+    def setUp(self):
+        self.client = admin_client(self)
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(6):
+                Role.objects.create(name=f'role{i}')
+
+    def get_page(self, **params):
+        response = self.client.get('/api/admin/roles/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def test_cursor_walks_all_rows_once(self):
+        ids = []
+        page = self.get_page(limit=3)
+        while True:
+            self.assertLessEqual(len(page['results']), 3)
+            ids.extend(role['id'] for role in page['results'])
+            if page['next_cursor'] is None:
+                break
+            page = self.get_page(limit=3, cursor=page['next_cursor'])
+
+        self.assertEqual(ids, sorted(Role.objects.values_list('id', flat=True)))
+
+    def test_fields_limit_serialized_columns(self):
+        page = self.get_page(limit=1, fields='id,name')
+        self.assertEqual(set(page['results'][0]), {'id', 'name'})
+        self.assertEqual(page['limit'], 1)
+
+    def test_limit_capped(self):
+        self.assertEqual(self.get_page(limit=100000)['limit'], 1000)
+
+    def test_invalid_parameters_rejected(self):
+        for params in ({'cursor': 'not-a-cursor'}, {'limit': 0}, {'limit': 'ten'}):
+            response = self.client.get('/api/admin/roles/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class AdminListETagTests(TestCase):
+    """Условный GET списков админки по версиям таблиц."""
+
+    def setUp(self):
+        # ETag выдается только на общем кеше
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, True)
+        shared_cache = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': location,
+        }})
+        shared_cache.enable()
+        self.addCleanup(shared_cache.disable)
+
+        self.client = admin_client(self)
+
+    def get_roles(self, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get('/api/admin/roles/', **headers)
+
+    def test_unchanged_list_returns_304(self):
+        etag = self.get_roles()['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.get_roles(etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_write_changes_etag(self):
+        etag = self.get_roles()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Role.objects.create(name='new')
+
+        response = self.get_roles(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_no_etag_on_process_local_cache(self):
+        self.assertFalse(self.get_roles().has_header('ETag'))
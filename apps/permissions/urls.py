@@ -6,7 +6,8 @@ from apps.permissions.views import (
     BusinessElementListView,
     BusinessElementDetailView,
     AccessRuleListView,
-    AccessRuleDetailView
+    AccessRuleDetailView,
+    UserRoleBulkView
 )
 
 app_name = 'permissions'
@@ -18,4 +19,5 @@ urlpatterns = [
     path('business-elements/<int:element_id>/', BusinessElementDetailView.as_view(), name='business-element-detail'),
     path('access-rules/', AccessRuleListView.as_view(), name='access-rule-list'),
     path('access-rules/<int:rule_id>/', AccessRuleDetailView.as_view(), name='access-rule-detail'),
+    path('user-roles/bulk/', UserRoleBulkView.as_view(), name='user-role-bulk'),
 ]
\ No newline at end of file
@@ -3,8 +3,17 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from apps.permissions.models import Role, BusinessElement, AccessRule
-from apps.permissions.serializers import RoleSerializer, BusinessElementSerializer, AccessRuleSerializer
+from apps.permissions.serializers import (
+    RoleSerializer,
+    BusinessElementSerializer,
+    AccessRuleSerializer,
+    BulkUserRoleSerializer
+)
 from apps.permissions.decorators.permission_required import permission_required
+from apps.permissions.services.role_service import RoleService
+from core.etags import etag_condition
+from core.exceptions import ValidationError
+from core.pagination import paginate, paginated_response, get_requested_fields
 from core.response import success_response, error_response
 
 
@@ -12,10 +21,14 @@ class RoleListView(APIView):
     """Список ролей."""
 
     @permission_required('access_rules', 'read')
+    @etag_condition(tables=[Role])
     def get(self, request):
-        roles = Role.objects.all()
-        serializer = RoleSerializer(roles, many=True)
-        return success_response(serializer.data)
+        try:
+            roles, next_cursor, limit = paginate(Role.objects.all(), request)
+            serializer = RoleSerializer(roles, many=True, fields=get_requested_fields(request))
+        except ValidationError as e:
+            return error_response(str(e), status_code=status.HTTP_400_BAD_REQUEST)
+        return paginated_response(serializer.data, next_cursor, limit)
 
     @permission_required('access_rules', 'create')
     def post(self, request):
@@ -30,6 +43,7 @@ class RoleDetailView(APIView):
     """Детали роли."""
 
     @permission_required('access_rules', 'read')
+    @etag_condition(row=(Role, 'role_id'))
     def get(self, request, role_id):
         try:
             role = Role.objects.get(id=role_id)
@@ -66,10 +80,14 @@ class BusinessElementListView(APIView):
     """Список бизнес-элементов."""
 
     @permission_required('access_rules', 'read')
+    @etag_condition(tables=[BusinessElement])
     def get(self, request):
-        elements = BusinessElement.objects.all()
-        serializer = BusinessElementSerializer(elements, many=True)
-        return success_response(serializer.data)
+        try:
+            elements, next_cursor, limit = paginate(BusinessElement.objects.all(), request)
+            serializer = BusinessElementSerializer(elements, many=True, fields=get_requested_fields(request))
+        except ValidationError as e:
+            return error_response(str(e), status_code=status.HTTP_400_BAD_REQUEST)
+        return paginated_response(serializer.data, next_cursor, limit)
 
     @permission_required('access_rules', 'create')
     def post(self, request):
@@ -84,6 +102,7 @@ class BusinessElementDetailView(APIView):
     """Детали бизнес-элемента."""
 
     @permission_required('access_rules', 'read')
+    @etag_condition(row=(BusinessElement, 'element_id'))
     def get(self, request, element_id):
         try:
             element = BusinessElement.objects.get(id=element_id)
@@ -118,10 +137,24 @@ class AccessRuleListView(APIView):
     """Список правил доступа."""
 
     @permission_required('access_rules', 'read')
+    @etag_condition(tables=[AccessRule, Role, BusinessElement])
     def get(self, request):
-        rules = AccessRule.objects.select_related('role', 'element').all()
-        serializer = AccessRuleSerializer(rules, many=True)
-        return success_response(serializer.data)
+        rules = AccessRule.objects.select_related('role', 'element')
+
+        role = request.query_params.get('role')
+        if role:
+            rules = rules.filter(role_id=role) if role.isdigit() else rules.filter(role__name=role)
+
+        element = request.query_params.get('element')
+        if element:
+            rules = rules.filter(element_id=element) if element.isdigit() else rules.filter(element__code=element)
+
+        try:
+            rules, next_cursor, limit = paginate(rules, request)
+            serializer = AccessRuleSerializer(rules, many=True, fields=get_requested_fields(request))
+        except ValidationError as e:
+            return error_response(str(e), status_code=status.HTTP_400_BAD_REQUEST)
+        return paginated_response(serializer.data, next_cursor, limit)
 
     @permission_required('access_rules', 'create')
     def post(self, request):
@@ -136,6 +169,7 @@ class AccessRuleDetailView(APIView):
     """Детали правила доступа."""
 
     @permission_required('access_rules', 'read')
+    @etag_condition(tables=[Role, BusinessElement], row=(AccessRule, 'rule_id'))
     def get(self, request, rule_id):
         try:
             rule = AccessRule.objects.select_related('role', 'element').get(id=rule_id)
@@ -163,4 +197,27 @@ class AccessRuleDetailView(APIView):
             rule.delete()
             return success_response(message="Access rule deleted")
         except AccessRule.DoesNotExist:
-            return error_response("Access rule not found", status_code=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+            return error_response("Access rule not found", status_code=status.HTTP_404_NOT_FOUND)
+
+
+class UserRoleBulkView(APIView):
+    """Массовое назначение и отзыв ролей."""
+
+    @permission_required('access_rules', 'update')
+    def post(self, request):
+        serializer = BulkUserRoleSerializer(data=request.data)
+        if not serializer.is_valid():
+            return error_response("Validation failed", errors=serializer.errors, status_code=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        try:
+            if data['action'] == 'assign':
+                result = RoleService.assign_roles_bulk(
+                    data['user_ids'], data['role_ids'], assigned_by=request.user.get_user()
+                )
+            else:
+                result = RoleService.revoke_roles_bulk(data['user_ids'], data['role_ids'])
+        except ValidationError as e:
+            return error_response(str(e), status_code=status.HTTP_400_BAD_REQUEST)
+
+        return success_response(result, message=f"Roles {data['action']} completed")
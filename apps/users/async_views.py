@@ -0,0 +1,67 @@
+"""Async views профиля пользователя для ASGI развертывания."""
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from apps.authentication.async_views import AsyncAPIView
+from apps.authentication.services.auth_service import AuthService
+from apps.users.serializers import UserProfileSerializer, UpdateUserSerializer
+from core.response import json_success_response, json_error_response
+
+
+class AsyncUserProfileView(AsyncAPIView):
+    """Управление профилем пользователя (async)."""
+
+    async def get(self, request):
+        if not request.user.is_authenticated:
+            return json_error_response(
+                message="Authentication required",
+                status_code=status.HTTP_401_UNAUTHORIZED
+            )
+
+        serializer = UserProfileSerializer(await request.user.aget_user())
+
+        return json_success_response(
+            data=serializer.data,
+            message="User profile retrieved successfully"
+        )
+
+    async def patch(self, request):
+        if not request.user.is_authenticated:
+            return json_error_response(
+                message="Authentication required",
+                status_code=status.HTTP_401_UNAUTHORIZED
+            )
+
+        user = await request.user.aget_user()
+        serializer = UpdateUserSerializer(
+            user,
+            data=request.data,
+            partial=True
+        )
+
+        if not serializer.is_valid():
+            return json_error_response(
+                message="Validation failed",
+                errors=serializer.errors,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        await sync_to_async(serializer.save)()
+
+        return json_success_response(
+            data=UserProfileSerializer(user).data,
+            message="User profile updated successfully"
+        )
+
+    async def delete(self, request):
+        if not request.user.is_authenticated:
+            return json_error_response(
+                message="Authentication required",
+                status_code=status.HTTP_401_UNAUTHORIZED
+            )
+
+        await sync_to_async(AuthService.deactivate_user)(request.user.id)
+
+        return json_success_response(
+            message="User account has been deactivated successfully",
+            status_code=status.HTTP_200_OK
+        )
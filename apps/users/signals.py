@@ -0,0 +1,11 @@
+"""Чтение своих записей после изменения пользователя при чтениях с реплик."""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from apps.users.models import User
+from core import db_router
+
+
+@receiver(post_save, sender=User)
+def pin_user_to_primary(sender, instance, **kwargs):
+    # В том числе нового: токены из ответа регистрации сразу используются в GET запросах
+    db_router.pin_users([instance.pk])
@@ -1 +1,204 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from apps.authentication.services.token_service import TokenService
+from apps.permissions.models import AccessRule, BusinessElement, Role, UserRole
+from apps.users.models import User
+from core import db_router
+
+
+@override_settings(BCRYPT_ROUNDS=4)
+class ImportUsersTests(TestCase):
+    """Импорт пользователей из JSONL."""
+
+    def setUp(self):
+        self.admin = Role.objects.create(name='admin')
+        Role.objects.create(name='user')
+
+    def import_rows(self, *rows):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'users.jsonl')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(row) + '\n' for row in rows)
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command('import_users', path, workers=1, stdout=io.StringIO())
+
+    def row(self, email, **extra):
+        return {'email': email, 'password': 'Secret123!', 'first_name': 'Import', 'last_name': 'Test', **extra}
+
+    def test_roles_string_is_single_role(self):
+        self.import_rows(self.row('string@test.com', roles='admin'))
+
+        user = User.objects.get(email='string@test.com')
+        self.assertEqual(list(UserRole.objects.filter(user=user).values_list('role_id', flat=True)), [self.admin.id])
+
+    def test_malformed_roles_rejected(self):
+        self.import_rows(
+            self.row('object@test.com', roles={'name': 'admin'}),
+            self.row('number@test.com', roles=[1]),
+            ['not', 'an', 'object']
+        )
+
+        self.assertFalse(User.objects.filter(email__in=['object@test.com', 'number@test.com']).exists())
+
+
+class PermissionCheckTests(TestCase):
+    """Пакетная проверка прав текущего пользователя."""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            role = Role.objects.create(name='editor')
+            AccessRule.objects.create(
+                role=role,
+                element=BusinessElement.objects.create(code='articles', name='Articles'),
+                can_read_all=True,
+                can_update=True
+            )
+            self.user = User.objects.create(email='check@test.com', password='-', first_name='Check', last_name='Test')
+            UserRole.objects.create(user=self.user, role=role)
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {TokenService.create_access_token(self.user.id)}')
+
+    def check(self, checks):
+        return self.client.post('/api/users/me/permissions/check/', {'checks': checks}, format='json')
+
+    def test_results_follow_request_order(self):
+        response = self.check([
+            {'resource': 'articles', 'action': 'read'},
+            {'resource': 'articles', 'action': 'update', 'owner_id': self.user.id},
+            {'resource': 'articles', 'action': 'update', 'owner_id': self.user.id + 1},
+            {'resource': 'articles', 'action': 'delete'},
+            {'resource': 'missing', 'action': 'read'},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result['allowed'] for result in response.json()['data']['results']],
+            [True, True, False, False, False]
+        )
+
+    def test_warm_batch_needs_no_queries(self):
+        checks = [{'resource': 'articles', 'action': 'read', 'owner_id': owner_id} for owner_id in range(50)]
+        self.check(checks[:1])
+
+        with self.assertNumQueries(0):
+            response = self.check(checks)
+        self.assertTrue(all(result['allowed'] for result in response.json()['data']['results']))
+
+    def test_invalid_action_rejected(self):
+        response = self.check([{'resource': 'articles', 'action': 'approve'}])
+        self.assertEqual(response.status_code, 400)
+
+    def test_anonymous_rejected(self):
+        self.client.credentials()
+        response = self.check([{'resource': 'articles', 'action': 'read'}])
+        self.assertEqual(response.status_code, 401)
+
+
+class UserPermissionsETagTests(TestCase):
+    """Условный GET эффективных прав текущего пользователя."""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.role = Role.objects.create(name='viewer')
+            AccessRule.objects.create(
+                role=self.role,
+                element=BusinessElement.objects.create(code='reports', name='Reports'),
+                can_read_all=True
+            )
+            self.user = User.objects.create(email='etag@test.com', password='-', first_name='ETag', last_name='Test')
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {TokenService.create_access_token(self.user.id)}')
+
+    def get_permissions(self, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get('/api/users/me/permissions/', **headers)
+
+    def test_unchanged_permissions_return_304(self):
+        etag = self.get_permissions()['ETag']
+
+        response = self.get_permissions(etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_role_change_changes_etag(self):
+        etag = self.get_permissions()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            UserRole.objects.create(user=self.user, role=self.role)
+
+        response = self.get_permissions(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['roles'], [self.role.id])
+
+
+@override_settings(DB_REPLICAS=['replica_1'], DB_REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    """Чтения с реплик и закрепление недавно измененных пользователей за primary."""
+
+    def setUp(self):
+        # Закрепления работают только на общем кеше
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, True)
+        shared_cache = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': location,
+        }})
+        shared_cache.enable()
+        self.addCleanup(shared_cache.disable)
+
+        self.router = db_router.PrimaryReplicaRouter()
+
+    def begin_request(self, primary=False):
+        self.addCleanup(db_router.end_request, db_router.begin_request(primary))
+
+    def read_alias(self):
+        return self.router.db_for_read(User)
+
+    def test_reads_outside_request_use_primary(self):
+        self.assertEqual(self.read_alias(), 'default')
+
+    def test_safe_request_reads_replica(self):
+        self.begin_request()
+        self.assertEqual(self.read_alias(), 'replica_1')
+        self.assertEqual(self.router.db_for_write(User), 'default')
+
+    def test_write_request_reads_primary(self):
+        self.begin_request(primary=True)
+        self.assertEqual(self.read_alias(), 'default')
+
+    def test_pinned_user_sticks_to_primary(self):
+        db_router.pin_users([7])
+        self.begin_request()
+
+        db_router.stick_to_user(8)
+        self.assertEqual(self.read_alias(), 'replica_1')
+
+        db_router.stick_to_user(7)
+        self.assertEqual(self.read_alias(), 'default')
+
+    async def test_async_pinned_user_sticks_to_primary(self):
+        db_router.pin_users([7])
+        token = db_router.begin_request(primary=False)
+        try:
+            await db_router.astick_to_user(7)
+            self.assertEqual(self.read_alias(), 'default')
+        finally:
+            db_router.end_request(token)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache_reads_primary(self):
+        self.begin_request()
+        self.assertEqual(self.read_alias(), 'default')
+
+    @override_settings(DB_REPLICAS=[])
+    def test_pin_without_replicas_is_noop(self):
+        db_router.pin_users([7])
+        self.assertIsNone(cache.get('db:primary_pin:7'))
@@ -1,11 +1,18 @@
 """
 URL configuration for users app.
 """
+from django.conf import settings
 from django.urls import path
-from apps.users.views import UserProfileView
+from apps.users.async_views import AsyncUserProfileView
+from apps.users.views import UserProfileView, PermissionCheckView, UserPermissionsView
 
 app_name = 'users'
 
+if settings.ASYNC_API:
+    UserProfileView = AsyncUserProfileView
+
 urlpatterns = [
     path('me/', UserProfileView.as_view(), name='profile'),
+    path('me/permissions/', UserPermissionsView.as_view(), name='permissions'),
+    path('me/permissions/check/', PermissionCheckView.as_view(), name='permission-check'),
 ]
\ No newline at end of file
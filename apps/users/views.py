@@ -1,7 +1,13 @@
 """API views для управления пользователями."""
+from django.utils.http import parse_etags
+from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status
 from apps.users.serializers import UserProfileSerializer, UpdateUserSerializer
+from apps.authentication.services.auth_service import AuthService
+from apps.permissions.serializers import BatchPermissionCheckSerializer
+from apps.permissions.services.permission_service import PermissionService
+from apps.permissions.services.rbac_index import RBACIndex
 from core.response import success_response, error_response
 
 
@@ -15,7 +21,7 @@ class UserProfileView(APIView):
                 status_code=status.HTTP_401_UNAUTHORIZED
             )
 
-        serializer = UserProfileSerializer(request.user)
+        serializer = UserProfileSerializer(request.user.get_user())
 
         return success_response(
             data=serializer.data,
@@ -29,8 +35,9 @@ class UserProfileView(APIView):
                 status_code=status.HTTP_401_UNAUTHORIZED
             )
 
+        user = request.user.get_user()
         serializer = UpdateUserSerializer(
-            request.user,
+            user,
             data=request.data,
             partial=True
         )
@@ -44,7 +51,7 @@ class UserProfileView(APIView):
 
         serializer.save()
 
-        profile_serializer = UserProfileSerializer(request.user)
+        profile_serializer = UserProfileSerializer(user)
 
         return success_response(
             data=profile_serializer.data,
@@ -58,10 +65,84 @@ class UserProfileView(APIView):
                 status_code=status.HTTP_401_UNAUTHORIZED
             )
 
-        request.user.is_active = False
-        request.user.save()
+        AuthService.deactivate_user(request.user.id)
 
         return success_response(
             message="User account has been deactivated successfully",
             status_code=status.HTTP_200_OK
         )
+
+
+class PermissionCheckView(APIView):
+    """Пакетная проверка прав текущего пользователя."""
+
+    def post(self, request):
+        if not request.user or not request.user.is_authenticated:
+            return error_response(
+                message="Authentication required",
+                status_code=status.HTTP_401_UNAUTHORIZED
+            )
+
+        serializer = BatchPermissionCheckSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return error_response(
+                message="Validation failed",
+                errors=serializer.errors,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        checks = serializer.validated_data['checks']
+        claims = request.auth if isinstance(request.auth, dict) else None
+
+        allowed = PermissionService.check_permissions(
+            user=request.user,
+            checks=[(check['resource'], check['action'], check.get('owner_id')) for check in checks],
+            claims=claims
+        )
+
+        results = [
+            {
+                'resource': check['resource'],
+                'action': check['action'],
+                'owner_id': check.get('owner_id'),
+                'allowed': is_allowed
+            }
+            for check, is_allowed in zip(checks, allowed)
+        ]
+
+        return success_response(
+            data={'results': results},
+            message="Permissions checked successfully"
+        )
+
+
+class UserPermissionsView(APIView):
+    """Эффективные права текущего пользователя с условным GET."""
+
+    def get(self, request):
+        if not request.user or not request.user.is_authenticated:
+            return error_response(
+                message="Authentication required",
+                status_code=status.HTTP_401_UNAUTHORIZED
+            )
+
+        claims = request.auth if isinstance(request.auth, dict) else None
+        snapshot = RBACIndex.snapshot()
+        role_ids = PermissionService.get_user_role_ids(request.user, claims, snapshot)
+        etag = PermissionService.get_permissions_etag(role_ids, snapshot.version)
+
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = success_response(
+                data={
+                    'roles': sorted(set(role_ids)),
+                    'permissions': RBACIndex.get_effective_permissions(role_ids, snapshot),
+                },
+                message="Permissions retrieved successfully"
+            )
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
@@ -1,4 +1,6 @@
+import os
 from pathlib import Path
+import json
 from decouple import config, Csv
 from datetime import timedelta
 
@@ -54,15 +56,67 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
 
-DATABASES = {
+# Native async views для auth, /api/users/me/ и mock ресурсов (uvicorn/ASGI)
+ASYNC_API = config('ASYNC_API', default=False, cast=bool)
+
+# DB_ENGINE=sqlite - локальный режим (бенчмарки, проверки) без PostgreSQL
+DB_ENGINE = config('DB_ENGINE', default='postgresql')
+
+if DB_ENGINE == 'sqlite':
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": config('DB_NAME'),
+            "USER": config('DB_USER'),
+            "PASSWORD": config('DB_PASSWORD'),
+            "HOST": config('DB_HOST'),
+            "PORT": config('DB_PORT', default=5432),
+            "OPTIONS": {
+                "connect_timeout": config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+            },
+        }
+    }
+
+# Постоянное соединение на поток воркера: живет до DB_CONN_MAX_AGE секунд (0 - новое на каждый запрос),
+# перед повторным использованием в новом запросе проверяется и при обрыве переоткрывается.
+# При ASYNC_API всегда 0: async ORM открывает соединения в потоках sync_to_async, которые не получают
+# сигналов конца запроса, и постоянные соединения копились бы до лимита БД
+DATABASES["default"].update({
+    "CONN_MAX_AGE": 0 if ASYNC_API else config('DB_CONN_MAX_AGE', default=60, cast=int),
+    "CONN_HEALTH_CHECKS": config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+})
+
+# Реплики для чтений: хосты PostgreSQL (при DB_ENGINE=sqlite - пути к файлам), алиасы replica_1, replica_2...
+DB_REPLICAS = []
+for index, replica in enumerate(config('DB_REPLICAS', default='', cast=Csv()), start=1):
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        ("NAME" if DB_ENGINE == 'sqlite' else "HOST"): replica,
+        "TEST": {"MIRROR": "default"},
+    }
+    DB_REPLICAS.append(alias)
+
+# Сколько секунд после изменения пользователя (роли, профиль) его чтения идут в primary
+DB_REPLICA_PIN_SECONDS = config('DB_REPLICA_PIN_SECONDS', default=5, cast=int)
+
+if DB_REPLICAS:
+    DATABASE_ROUTERS = ["core.db_router.PrimaryReplicaRouter"]
+    MIDDLEWARE.append("core.middleware.ReplicaRoutingMiddleware")
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": config('DB_NAME'),
-        "USER": config('DB_USER'),
-        "PASSWORD": config('DB_PASSWORD'),
-        "HOST": config('DB_HOST'),
-        "PORT": config('DB_PORT', default=5432),
+        "BACKEND": config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        "LOCATION": config('CACHE_LOCATION', default=''),
     }
 }
 
@@ -100,5 +154,59 @@ JWT_SECRET_KEY = config('JWT_SECRET_KEY')
 JWT_ACCESS_TOKEN_LIFETIME = timedelta(minutes=config('JWT_ACCESS_TOKEN_LIFETIME_MINUTES', default=30, cast=int))
 JWT_REFRESH_TOKEN_LIFETIME = timedelta(days=config('JWT_REFRESH_TOKEN_LIFETIME_DAYS', default=7, cast=int))
 JWT_ALGORITHM = 'HS256'
+# JSON список ключей: [{"kid": "...", "alg": "EdDSA|ES256|HS256", "status": "active|retiring",
+#                       "secret": "..." | "private_key_path": "...", "public_key_path": "..."}]
+JWT_SIGNING_KEYS = config('JWT_SIGNING_KEYS', default='[]', cast=json.loads)
+JWT_EMBED_RBAC_CLAIMS = config('JWT_EMBED_RBAC_CLAIMS', default=False, cast=bool)
+JWT_TOKEN_CACHE_SIZE = config('JWT_TOKEN_CACHE_SIZE', default=10000, cast=int)
+JWT_TOKEN_CACHE_TTL_SECONDS = config('JWT_TOKEN_CACHE_TTL_SECONDS', default=60, cast=int)
+JWT_REVOCATION_FILTER_CAPACITY = config('JWT_REVOCATION_FILTER_CAPACITY', default=100000, cast=int)
+JWT_REVOCATION_FILTER_ERROR_RATE = config('JWT_REVOCATION_FILTER_ERROR_RATE', default=0.01, cast=float)
+JWT_REVOCATION_PRUNE_INTERVAL_SECONDS = config('JWT_REVOCATION_PRUNE_INTERVAL_SECONDS', default=3600, cast=int)
+JWT_REVOCATION_LOCAL_SYNC_SECONDS = config('JWT_REVOCATION_LOCAL_SYNC_SECONDS', default=5, cast=int)
 
 AUTH_USER_MODEL = 'users.User'
+
+BCRYPT_ROUNDS = config('BCRYPT_ROUNDS', default=12, cast=int)
+PASSWORD_HASHER_WORKERS = config('PASSWORD_HASHER_WORKERS', default=os.cpu_count() or 2, cast=int)
+PASSWORD_HASHER_QUEUE_SIZE = config('PASSWORD_HASHER_QUEUE_SIZE', default=64, cast=int)
+
+RBAC_USER_ROLES_CACHE_SIZE = config('RBAC_USER_ROLES_CACHE_SIZE', default=10000, cast=int)
+# Холодные проверки по таблице user_effective_permissions; включать после rebuild_effective_permissions
+RBAC_MATERIALIZED_PERMISSIONS = config('RBAC_MATERIALIZED_PERMISSIONS', default=False, cast=bool)
+
+# Лимиты логина/регистрации ('N/s|min|hour|day'); для нескольких воркеров - CacheThrottleBackend с общим кешем
+LOGIN_THROTTLE_ENABLED = config('LOGIN_THROTTLE_ENABLED', default=True, cast=bool)
+LOGIN_THROTTLE_BACKEND = config(
+    'LOGIN_THROTTLE_BACKEND',
+    default='apps.authentication.services.throttle_service.LocalThrottleBackend'
+)
+LOGIN_THROTTLE_IP_RATE = config('LOGIN_THROTTLE_IP_RATE', default='30/min')
+LOGIN_THROTTLE_EMAIL_RATE = config('LOGIN_THROTTLE_EMAIL_RATE', default='10/min')
+REGISTER_THROTTLE_IP_RATE = config('REGISTER_THROTTLE_IP_RATE', default='10/hour')
+REGISTER_THROTTLE_EMAIL_RATE = config('REGISTER_THROTTLE_EMAIL_RATE', default='3/hour')
+LOGIN_THROTTLE_NUM_PROXIES = config('LOGIN_THROTTLE_NUM_PROXIES', default=0, cast=int)
+
+# METRICS_DIR - общий каталог для файлов процессов (очищать при деплое); пусто - метрики одного процесса
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_DIR = config('METRICS_DIR', default='')
+METRICS_AUTH_TOKEN = config('METRICS_AUTH_TOKEN', default='')
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, "core.middleware.MetricsMiddleware")
+
+# Замеры фаз запроса: заголовок Server-Timing и JSON строка в логгер core.timing
+SERVER_TIMING_ENABLED = config('SERVER_TIMING_ENABLED', default=False, cast=bool)
+if SERVER_TIMING_ENABLED:
+    MIDDLEWARE.insert(0, "core.middleware.ServerTimingMiddleware")
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = ['core.renderers.TimedJSONRenderer']
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.timing': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
@@ -1,10 +1,11 @@
 """URL configuration for config project."""
 from django.urls import path, include
-from core.views import WelcomeView, APITestView
+from core.views import WelcomeView, APITestView, metrics_view
 
 urlpatterns = [
     path("", WelcomeView.as_view(), name="welcome"),
     path("test/", APITestView.as_view(), name="api-test"),
+    path("metrics", metrics_view, name="metrics"),
     path("api/auth/", include("apps.authentication.urls")),
     path("api/users/", include("apps.users.urls")),
     path("api/admin/", include("apps.permissions.urls")),
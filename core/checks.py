@@ -0,0 +1,36 @@
+"""Системные проверки конфигурации."""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+# Кеши, которые каждый процесс держит у себя: воркеры не видят записей друг друга
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Что хранится в кеше и должно быть общим для всех воркеров
+SHARED_CACHE_STATE = (
+    'RBAC policy version',
+    'token revocation version',
+    'user deactivation markers',
+    'ETag versions',
+    'replica read pins',
+)
+
+
+def is_shared_cache(alias: str = 'default') -> bool:
+    """Общий ли кеш для всех процессов (Redis, Memcached, БД, файлы)."""
+    return settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_CACHE_BACKENDS
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    if is_shared_cache():
+        return []
+    return [Warning(
+        f"CACHES['default'] is process-local ({settings.CACHES['default']['BACKEND']}): "
+        f"{', '.join(SHARED_CACHE_STATE)} will not be shared between workers.",
+        hint='Set CACHE_BACKEND to Redis, Memcached, DatabaseCache or FileBasedCache for more than one worker process.',
+        id='core.W001'
+    )]
@@ -0,0 +1,94 @@
+"""Чтения с реплик, записи в primary, чтение своих записей после изменений."""
+import contextvars
+import random
+from typing import Iterable, Optional
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from core.checks import is_shared_cache
+
+
+class _RoutingState:
+    """Маршрутизация текущего запроса; primary=True - все чтения в primary."""
+    __slots__ = ('primary',)
+
+    def __init__(self, primary: bool):
+        self.primary = primary
+
+
+# None вне запроса (команды, shell, фоновые задачи): там все идет в primary
+_state: contextvars.ContextVar[Optional[_RoutingState]] = contextvars.ContextVar('db_routing', default=None)
+
+
+def _pin_key(user_id) -> str:
+    return f'db:primary_pin:{user_id}'
+
+
+def begin_request(primary: bool) -> contextvars.Token:
+    # Закрепления в кеше процесса не видны другим воркерам: без общего кеша чтения только из primary
+    return _state.set(_RoutingState(primary or not is_shared_cache()))
+
+
+def end_request(token: contextvars.Token) -> None:
+    _state.reset(token)
+
+
+def pin_users(user_ids: Iterable) -> None:
+    """Чтения пользователей идут в primary DB_REPLICA_PIN_SECONDS секунд: реплики успевают догнать запись."""
+    if not settings.DB_REPLICAS:
+        return
+
+    keys = {_pin_key(user_id): True for user_id in user_ids}
+    if not keys:
+        return
+
+    # До коммита и после него: окно отсчитывается от момента, когда запись стала видна
+    timeout = settings.DB_REPLICA_PIN_SECONDS
+    cache.set_many(keys, timeout)
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        transaction.on_commit(lambda: cache.set_many(keys, timeout))
+
+
+def stick_to_user(user_id) -> None:
+    """Переводит оставшиеся чтения запроса в primary, если пользователь недавно изменялся."""
+    state = _state.get()
+    if state is None or state.primary or not user_id:
+        return
+
+    if cache.get(_pin_key(user_id)):
+        state.primary = True
+
+
+async def astick_to_user(user_id) -> None:
+    """Async вариант stick_to_user()."""
+    state = _state.get()
+    if state is None or state.primary or not user_id:
+        return
+
+    if await cache.aget(_pin_key(user_id)):
+        state.primary = True
+
+
+class PrimaryReplicaRouter:
+    """Чтения безопасных запросов - на случайную реплику из DB_REPLICAS, все остальное - в primary."""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.primary or not settings.DB_REPLICAS:
+            return DEFAULT_DB_ALIAS
+
+        # Внутри транзакции чтения должны видеть ее же записи
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+
+        return random.choice(settings.DB_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,76 @@
+"""ETag по версиям таблиц и строк, хранящимся в кеше."""
+import hashlib
+import uuid
+from functools import wraps
+from typing import Iterable, List, Optional, Tuple
+from django.core.cache import cache
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+from core.checks import is_shared_cache
+
+
+def _table_key(model) -> str:
+    return f'etag:{model._meta.db_table}'
+
+
+def _row_key(model, pk) -> str:
+    return f'etag:{model._meta.db_table}:{pk}'
+
+
+def get_versions(keys: List[str]) -> List[str]:
+    """Версии по ключам одним обращением к кешу; отсутствующие (вытесненные) создаются заново."""
+    versions = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump(model, pk=None) -> None:
+    """Новая версия таблицы (и строки, если передан pk)."""
+    keys = [_table_key(model)]
+    if pk is not None:
+        keys.append(_row_key(model, pk))
+    cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+
+def make_etag(*parts: str) -> str:
+    return '"' + hashlib.sha256(':'.join(parts).encode('utf-8')).hexdigest()[:32] + '"'
+
+
+def etag_condition(tables: Iterable = (), row: Optional[Tuple] = None):
+    """Условный GET: 304 по If-None-Match до вызова view (и до запросов к БД).
+
+    tables - модели, от версий которых зависит ответ; row - (модель, имя kwarg с pk).
+    На process-local кеше ETag не выдается: другой воркер не узнал бы о новой версии и ответил бы 304.
+    """
+    tables = tuple(tables)
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(view_instance, request, *args, **kwargs):
+            if not is_shared_cache():
+                return view_func(view_instance, request, *args, **kwargs)
+
+            keys = [_table_key(model) for model in tables]
+            if row is not None:
+                model, kwarg = row
+                keys.append(_row_key(model, kwargs[kwarg]))
+
+            etag = make_etag(request.get_full_path(), *get_versions(keys))
+
+            if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = view_func(view_instance, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+
+            response['ETag'] = etag
+            response['Cache-Control'] = 'private, no-cache'
+            return response
+
+        return wrapper
+    return decorator
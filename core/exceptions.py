@@ -1,4 +1,5 @@
 """Кастомные исключения."""
+import math
 from rest_framework import status
 from rest_framework.exceptions import APIException
 
@@ -36,4 +37,20 @@ class UserInactive(APIException):
 class ValidationError(APIException):
     status_code = status.HTTP_400_BAD_REQUEST
     default_detail = 'Validation error.'
-    default_code = 'validation_error'
\ No newline at end of file
+    default_code = 'validation_error'
+
+
+class PasswordHasherBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Server is busy, please retry later.'
+    default_code = 'password_hasher_busy'
+
+
+class TooManyRequests(APIException):
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
+    default_detail = 'Too many attempts, please retry later.'
+    default_code = 'too_many_requests'
+
+    def __init__(self, detail=None, code=None, wait=None):
+        super().__init__(detail, code)
+        self.wait = math.ceil(wait) if wait is not None else None
@@ -0,0 +1,285 @@
+"""Реестр метрик с агрегацией между процессами через mmap файлы."""
+import bisect
+import functools
+import glob
+import mmap
+import os
+import struct
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+
+METRICS = {
+    'auth_login_total': ('counter', 'Login attempts by result.'),
+    'auth_token_verifications_total': ('counter', 'Access token verifications by result.'),
+    'rbac_permission_checks_total': ('counter', 'Permission checks by business element (unknown for other codes) and result.'),
+    'rbac_forbidden_responses_total': ('counter', '403 responses returned by permission_required.'),
+    'auth_throttled_total': ('counter', 'Login and register attempts rejected by throttling.'),
+    'http_request_duration_seconds': ('histogram', 'View latency in seconds.'),
+    'db_connections_opened_total': ('counter', 'New database connections (handshakes) by alias.'),
+}
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+_BUCKET_LABELS = tuple('+Inf' if bound == float('inf') else repr(bound) for bound in BUCKETS)
+
+
+class MmapStore:
+    """Значения серий одного процесса: [used:uint32][pad], далее [len:uint32][key][pad][value:double]."""
+    HEADER_SIZE = 8
+    INITIAL_SIZE = 64 * 1024
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.positions: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self._file = None
+
+        if path:
+            self._file = open(path, 'a+b')
+            if os.fstat(self._file.fileno()).st_size < self.INITIAL_SIZE:
+                self._file.truncate(self.INITIAL_SIZE)
+            self._mmap = mmap.mmap(self._file.fileno(), 0)
+        else:
+            self._mmap = mmap.mmap(-1, self.INITIAL_SIZE)
+
+        self.used = struct.unpack_from('I', self._mmap, 0)[0]
+        if self.used == 0:
+            self.used = self.HEADER_SIZE
+            struct.pack_into('I', self._mmap, 0, self.used)
+        for key, offset, _ in self._entries(self._mmap, self.used):
+            self.positions[key] = offset
+
+    def inc(self, key: str, amount: float) -> None:
+        with self.lock:
+            offset = self.positions.get(key)
+            if offset is None:
+                offset = self._allocate(key)
+            value = struct.unpack_from('d', self._mmap, offset)[0]
+            struct.pack_into('d', self._mmap, offset, value + amount)
+
+    def items(self) -> List[Tuple[str, float]]:
+        with self.lock:
+            return [(key, value) for key, _, value in self._entries(self._mmap, self.used)]
+
+    def _allocate(self, key: str) -> int:
+        encoded = key.encode('utf-8')
+        padded = len(encoded) + (8 - (4 + len(encoded)) % 8) % 8
+        size = 4 + padded + 8
+
+        if self.used + size > len(self._mmap):
+            self._grow(self.used + size)
+
+        struct.pack_into(f'I{padded}sd', self._mmap, self.used, len(encoded), encoded, 0.0)
+        offset = self.used + 4 + padded
+        self.used += size
+        # Заголовок пишется последним: читатель не увидит недописанную запись
+        struct.pack_into('I', self._mmap, 0, self.used)
+        self.positions[key] = offset
+        return offset
+
+    def _grow(self, required: int) -> None:
+        size = len(self._mmap)
+        while size < required:
+            size *= 2
+
+        if self._file is not None:
+            self._mmap.close()
+            self._file.truncate(size)
+            self._mmap = mmap.mmap(self._file.fileno(), 0)
+        else:
+            grown = mmap.mmap(-1, size)
+            grown[:self.used] = self._mmap[:self.used]
+            self._mmap.close()
+            self._mmap = grown
+
+    @staticmethod
+    def _entries(buffer, used: int) -> Iterator[Tuple[str, int, float]]:
+        position = MmapStore.HEADER_SIZE
+        while position < used:
+            length = struct.unpack_from('I', buffer, position)[0]
+            padded = length + (8 - (4 + length) % 8) % 8
+            key = bytes(buffer[position + 4:position + 4 + length]).decode('utf-8')
+            offset = position + 4 + padded
+            yield key, offset, struct.unpack_from('d', buffer, offset)[0]
+            position = offset + 8
+
+    @staticmethod
+    def read_file(path: str) -> Iterator[Tuple[str, float]]:
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < MmapStore.HEADER_SIZE:
+            return
+        used = min(struct.unpack_from('I', data, 0)[0], len(data))
+        yield from ((key, value) for key, _, value in MmapStore._entries(data, used))
+
+
+_store: Optional[MmapStore] = None
+_store_pid: Optional[int] = None
+_store_lock = threading.Lock()
+
+
+def _get_store() -> Optional[MmapStore]:
+    global _store, _store_pid
+
+    pid = os.getpid()
+    if _store_pid == pid:
+        return _store
+
+    # Первый вызов или дочерний процесс после fork: у каждого процесса свой файл
+    with _store_lock:
+        if _store_pid != pid:
+            store = None
+            if settings.METRICS_ENABLED:
+                directory = settings.METRICS_DIR
+                path = os.path.join(directory, f'metrics_{pid}.db') if directory else None
+                store = MmapStore(path)
+            _store, _store_pid = store, pid
+        return _store
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _series(name: str, labels: Dict) -> str:
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{label}="{_escape(value)}"' for label, value in sorted(labels.items())) + '}'
+
+
+def inc(name: str, amount: float = 1.0, **labels) -> None:
+    """Увеличивает счетчик."""
+    store = _get_store()
+    if store is not None:
+        store.inc(_series(name, labels), amount)
+
+
+def observe(name: str, value: float, **labels) -> None:
+    """Добавляет наблюдение в гистограмму."""
+    store = _get_store()
+    if store is None:
+        return
+
+    base = ','.join(f'{label}="{_escape(label_value)}"' for label, label_value in sorted(labels.items()))
+    le = _BUCKET_LABELS[bisect.bisect_left(BUCKETS, value)]
+    suffix = '{' + base + '}' if base else ''
+
+    store.inc(f'{name}_bucket{{{base + "," if base else ""}le="{le}"}}', 1.0)
+    store.inc(f'{name}_sum{suffix}', value)
+    store.inc(f'{name}_count{suffix}', 1.0)
+
+
+def count_outcome(name: str):
+    """Декоратор: result="success", если функция вернула значение, иначе "failure"."""
+    def decorator(func):
+        if iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception:
+                    inc(name, result='failure')
+                    raise
+                inc(name, result='success')
+                return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                inc(name, result='failure')
+                raise
+            inc(name, result='success')
+            return result
+        return wrapper
+    return decorator
+
+
+def _count_connection(sender=None, connection=None, **kwargs):
+    inc('db_connections_opened_total', alias=connection.alias, vendor=connection.vendor)
+
+
+def install_connection_counter() -> None:
+    """Считает новые соединения с БД: при постоянных соединениях растет медленнее числа запросов."""
+    connection_created.connect(_count_connection, dispatch_uid='core.metrics.connection_counter')
+
+
+def collect() -> Dict[str, float]:
+    """Сумма значений серий по всем процессам."""
+    totals: Dict[str, float] = {}
+
+    directory = settings.METRICS_DIR
+    if directory:
+        sources = (MmapStore.read_file(path) for path in glob.glob(os.path.join(directory, 'metrics_*.db')))
+    else:
+        store = _get_store()
+        sources = [store.items()] if store is not None else []
+
+    for source in sources:
+        for key, value in source:
+            totals[key] = totals.get(key, 0.0) + value
+
+    return totals
+
+
+def _family(key: str) -> str:
+    name = key.split('{', 1)[0]
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and name[:-len(suffix)] in METRICS:
+            return name[:-len(suffix)]
+    return name
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def render() -> str:
+    """Метрики в текстовом формате Prometheus."""
+    families: Dict[str, Dict[str, float]] = {}
+    for key, value in collect().items():
+        families.setdefault(_family(key), {})[key] = value
+
+    lines = []
+    for family in sorted(families):
+        metric_type, description = METRICS.get(family, ('untyped', ''))
+        lines.append(f'# HELP {family} {description}')
+        lines.append(f'# TYPE {family} {metric_type}')
+
+        series = families[family]
+        if metric_type == 'histogram':
+            samples = _histogram_samples(series)
+        else:
+            samples = sorted(series.items())
+
+        lines.extend(f'{key} {_format(value)}' for key, value in samples)
+
+    return '\n'.join(lines) + '\n'
+
+
+def _histogram_samples(series: Dict[str, float]) -> List[Tuple[str, float]]:
+    """В хранилище бакеты не накопительные: отдаем их в виде le-сумм в порядке границ."""
+    grouped: Dict[str, Dict[str, float]] = {}
+    others = []
+
+    for key, value in series.items():
+        if not key.split('{', 1)[0].endswith('_bucket'):
+            others.append((key, value))
+            continue
+        prefix, le = key.rsplit('le="', 1)
+        grouped.setdefault(prefix, {})[le[:-2]] = value
+
+    samples = []
+    for prefix in sorted(grouped):
+        running = 0.0
+        counts = grouped[prefix]
+        for le in _BUCKET_LABELS:
+            running += counts.get(le, 0.0)
+            samples.append((f'{prefix}le="{le}"}}', running))
+
+    return samples + sorted(others)
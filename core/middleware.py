@@ -0,0 +1,149 @@
+"""Middleware замеров времени запроса (Server-Timing, метрики) и маршрутизации чтений по репликам."""
+import json
+import logging
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from core import db_router, metrics, timing
+
+
+logger = logging.getLogger('core.timing')
+
+
+class ServerTimingMiddleware:
+    """Отдает фазы запроса в заголовке Server-Timing и в лог одной JSON строкой."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        timing.install_query_counter()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        token = timing.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            timings = timing.finish(token)
+
+        return self._report(request, response, timings)
+
+    async def __acall__(self, request):
+        token = timing.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timings = timing.finish(token)
+
+        return self._report(request, response, timings)
+
+    def _report(self, request, response, timings):
+        total_ms = timings.total() * 1000
+        metrics = [f'total;dur={total_ms:.2f}', f'db;desc="queries={timings.queries}"']
+        phases = {}
+
+        for name, (duration, queries, calls) in timings.phases.items():
+            duration_ms = duration * 1000
+            metrics.append(f'{name};dur={duration_ms:.2f};desc="queries={queries} calls={calls}"')
+            phases[name] = {'ms': round(duration_ms, 3), 'queries': queries, 'calls': calls}
+
+        response['Server-Timing'] = ', '.join(metrics)
+
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 3),
+            'queries': timings.queries,
+            'phases': phases,
+        }))
+
+        return response
+
+
+class MetricsMiddleware:
+    """Гистограмма длительности запросов по view и счетчик новых соединений с БД."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        metrics.install_connection_counter()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self._observe(request, response, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._observe(request, response, time.perf_counter() - started)
+        return response
+
+    def _observe(self, request, response, duration):
+        match = request.resolver_match
+        metrics.observe(
+            'http_request_duration_seconds',
+            duration,
+            view=match.view_name if match is not None else 'unmatched',
+            method=request.method,
+            status=response.status_code
+        )
+
+
+class ReplicaRoutingMiddleware:
+    """Безопасные методы читают с реплик; после успешной записи автор читает из primary."""
+    sync_capable = True
+    async_capable = True
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        token = db_router.begin_request(primary=request.method not in self.SAFE_METHODS)
+        try:
+            response = self.get_response(request)
+        finally:
+            db_router.end_request(token)
+
+        self._pin_author(request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = db_router.begin_request(primary=request.method not in self.SAFE_METHODS)
+        try:
+            response = await self.get_response(request)
+        finally:
+            db_router.end_request(token)
+
+        self._pin_author(request, response)
+        return response
+
+    def _pin_author(self, request, response):
+        if request.method in self.SAFE_METHODS or response.status_code >= 400:
+            return
+
+        # request.user выставляет аутентификация DRF
+        user_id = getattr(getattr(request, 'user', None), 'id', None)
+        if user_id:
+            db_router.pin_users([user_id])
@@ -0,0 +1,75 @@
+"""Keyset (cursor) пагинация списков."""
+import base64
+import binascii
+import json
+from typing import List, Optional, Tuple
+from core.exceptions import ValidationError
+from core.response import success_response
+
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+def encode_cursor(last_id: int) -> str:
+    """Непрозрачный курсор: id последней записи страницы."""
+    return base64.urlsafe_b64encode(json.dumps({'id': last_id}).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))['id']
+    except (binascii.Error, ValueError, TypeError, KeyError, UnicodeEncodeError):
+        raise ValidationError("Invalid cursor")
+
+    if not isinstance(last_id, int):
+        raise ValidationError("Invalid cursor")
+    return last_id
+
+
+def get_limit(request, default: int = DEFAULT_LIMIT, maximum: int = MAX_LIMIT) -> int:
+    value = request.query_params.get('limit')
+    if value is None:
+        return default
+
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValidationError("limit must be an integer")
+
+    if limit < 1:
+        raise ValidationError("limit must be positive")
+    return min(limit, maximum)
+
+
+def paginate(queryset, request, default_limit: int = DEFAULT_LIMIT) -> Tuple[List, Optional[str], int]:
+    """Страница по возрастанию id после курсора: стоимость не зависит от глубины."""
+    limit = get_limit(request, default_limit)
+
+    cursor = request.query_params.get('cursor')
+    if cursor:
+        queryset = queryset.filter(id__gt=decode_cursor(cursor))
+
+    # Лишняя запись только показывает, есть ли следующая страница
+    items = list(queryset.order_by('id')[:limit + 1])
+    next_cursor = encode_cursor(items[limit - 1].id) if len(items) > limit else None
+
+    return items[:limit], next_cursor, limit
+
+
+def paginated_response(results, next_cursor: Optional[str], limit: int):
+    """Ответ со страницей и курсором следующей (None - страниц больше нет)."""
+    return success_response({
+        'results': results,
+        'next_cursor': next_cursor,
+        'limit': limit,
+    })
+
+
+def get_requested_fields(request) -> Optional[List[str]]:
+    """Поля из ?fields=a,b (None - все поля)."""
+    value = request.query_params.get('fields')
+    if not value:
+        return None
+    return [field.strip() for field in value.split(',') if field.strip()]
@@ -0,0 +1,11 @@
+"""Рендереры DRF."""
+from rest_framework.renderers import JSONRenderer
+from core.timing import phase
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer с замером фазы сериализации ответа."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with phase('render'):
+            return super().render(data, accepted_media_type, renderer_context)
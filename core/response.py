@@ -1,10 +1,11 @@
 """Стандартизация API ответов."""
+from django.http import JsonResponse
 from rest_framework.response import Response
 from rest_framework import status
+from core.timing import phase
 
 
-def success_response(data=None, message=None, status_code=status.HTTP_200_OK):
-    """Стандартный успешный ответ."""
+def _success_data(data=None, message=None):
     response_data = {
         'success': True,
     }
@@ -15,11 +16,10 @@ def success_response(data=None, message=None, status_code=status.HTTP_200_OK):
     if data is not None:
         response_data['data'] = data
 
-    return Response(response_data, status=status_code)
+    return response_data
 
 
-def error_response(message, errors=None, status_code=status.HTTP_400_BAD_REQUEST):
-    """Стандартный ответ с ошибкой."""
+def _error_data(message, errors=None):
     response_data = {
         'success': False,
         'message': message,
@@ -28,4 +28,26 @@ def error_response(message, errors=None, status_code=status.HTTP_400_BAD_REQUEST
     if errors:
         response_data['errors'] = errors
 
-    return Response(response_data, status=status_code)
\ No newline at end of file
+    return response_data
+
+
+def success_response(data=None, message=None, status_code=status.HTTP_200_OK):
+    """Стандартный успешный ответ."""
+    return Response(_success_data(data, message), status=status_code)
+
+
+def error_response(message, errors=None, status_code=status.HTTP_400_BAD_REQUEST):
+    """Стандартный ответ с ошибкой."""
+    return Response(_error_data(message, errors), status=status_code)
+
+
+def json_success_response(data=None, message=None, status_code=status.HTTP_200_OK):
+    """Успешный ответ для async views (без DRF рендеринга)."""
+    with phase('render'):
+        return JsonResponse(_success_data(data, message), status=status_code)
+
+
+def json_error_response(message, errors=None, status_code=status.HTTP_400_BAD_REQUEST):
+    """Ответ с ошибкой для async views (без DRF рендеринга)."""
+    with phase('render'):
+        return JsonResponse(_error_data(message, errors), status=status_code)
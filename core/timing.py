@@ -0,0 +1,126 @@
+"""Замеры фаз запроса для Server-Timing."""
+import functools
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from asgiref.sync import iscoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+_current: ContextVar[Optional['RequestTimings']] = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Накопленные длительности и число SQL запросов по фазам одного запроса."""
+    __slots__ = ('started', 'queries', 'phases')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.phases: Dict[str, List] = {}
+
+    def add(self, name: str, duration: float, queries: int) -> None:
+        phase = self.phases.get(name)
+        if phase is None:
+            self.phases[name] = [duration, queries, 1]
+        else:
+            phase[0] += duration
+            phase[1] += queries
+            phase[2] += 1
+
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+
+class _Phase:
+    __slots__ = ('timings', 'name', 'started', 'queries')
+
+    def __init__(self, timings: RequestTimings, name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.queries = self.timings.queries
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.add(self.name, time.perf_counter() - self.started, self.timings.queries - self.queries)
+        return False
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+def start() -> object:
+    """Начинает замеры для текущего контекста; возвращает токен для finish()."""
+    return _current.set(RequestTimings())
+
+
+def finish(token) -> Optional[RequestTimings]:
+    """Завершает замеры, начатые start()."""
+    timings = _current.get()
+    _current.reset(token)
+    return timings
+
+
+def phase(name: str):
+    """Контекстный менеджер фазы; без активных замеров - пустышка."""
+    timings = _current.get()
+    if timings is None:
+        return _NULL_PHASE
+    return _Phase(timings, name)
+
+
+def timed(name: str):
+    """Декоратор фазы для sync и async функций."""
+    def decorator(func):
+        if iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                timings = _current.get()
+                if timings is None:
+                    return await func(*args, **kwargs)
+                with _Phase(timings, name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = _current.get()
+            if timings is None:
+                return func(*args, **kwargs)
+            with _Phase(timings, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _count_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is not None:
+        timings.queries += 1
+    return execute(sql, params, many, context)
+
+
+def _install_query_counter(sender=None, connection=None, **kwargs):
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+def install_query_counter() -> None:
+    """Подключает счетчик SQL запросов ко всем соединениям, текущим и будущим."""
+    connection_created.connect(_install_query_counter, dispatch_uid='core.timing.query_counter')
+    for connection in connections.all(initialized_only=True):
+        _install_query_counter(connection=connection)
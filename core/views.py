@@ -1,6 +1,10 @@
 """Core views."""
+import hmac
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
 from rest_framework.views import APIView
+from core import metrics
 
 
 class WelcomeView(APIView):
@@ -16,4 +20,16 @@ class APITestView(APIView):
     permission_classes = []
 
     def get(self, request):
-        return render(request, 'api_test.html')
\ No newline at end of file
+        return render(request, 'api_test.html')
+
+
+def metrics_view(request):
+    """Метрики в формате Prometheus; METRICS_AUTH_TOKEN включает проверку Bearer токена."""
+    if not settings.METRICS_ENABLED:
+        raise Http404
+
+    token = settings.METRICS_AUTH_TOKEN
+    if token and not hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -133,13 +133,13 @@ echo ""
 echo -e "${YELLOW}Admin API${NC}"
 
 ADMIN_ROLES=$(curl -s -X GET http://127.0.0.1:8000/api/admin/roles/ -H "Authorization: Bearer $ADMIN_TOKEN")
-check_result "Admin get roles" "success" "$ADMIN_ROLES"
+check_result "Admin get roles" "\"next_cursor\"" "$ADMIN_ROLES"
 
 ADMIN_ELEMENTS=$(curl -s -X GET http://127.0.0.1:8000/api/admin/business-elements/ -H "Authorization: Bearer $ADMIN_TOKEN")
-check_result "Admin get elements" "success" "$ADMIN_ELEMENTS"
+check_result "Admin get elements" "\"next_cursor\"" "$ADMIN_ELEMENTS"
 
 ADMIN_RULES=$(curl -s -X GET http://127.0.0.1:8000/api/admin/access-rules/ -H "Authorization: Bearer $ADMIN_TOKEN")
-check_result "Admin get rules" "success" "$ADMIN_RULES"
+check_result "Admin get rules" "\"next_cursor\"" "$ADMIN_RULES"
 
 USER_RULES=$(curl -s -X GET http://127.0.0.1:8000/api/admin/access-rules/ -H "Authorization: Bearer $USER_TOKEN")
 check_result "User access denied (403)" "permission" "$USER_RULES"